@@ -6,11 +6,12 @@ import importlib
 import sys
 import re
 import io
+import hashlib
 import subprocess
 from kubernetes import client, config, stream
 from requests.auth import HTTPBasicAuth
 import requests
-from .testing import module1
+from .testing import module1, tango_manager
 
 app = Flask(__name__, template_folder='templates')
 app.register_blueprint(module1, url_prefix="/module1")
@@ -27,9 +28,42 @@ def home ():
 
 @app.route('/tango')
 def tango_list ():
-   import tango
-   db=tango.Database()
-   return list(db.get_device_exported("*").value_string)
+   """
+   Exported Tango devices, served from a cache that is refreshed every
+   TANGO_INVENTORY_TTL_S seconds (or with refresh=1).
+
+   Query parameters (all optional):
+   /tango?pattern=mid-csp/*&regex=subarray&offset=0&limit=100&refresh=1
+
+   The body is the list of matching device names; the total number of
+   matches is in the X-Total-Count header. Responses carry an ETag, so
+   clients sending If-None-Match get a 304 while nothing changed.
+   """
+   pattern = request.args.get("pattern")
+   regex = request.args.get("regex")
+   refresh = request.args.get("refresh", "").lower() in ("1", "true", "yes")
+   try:
+      offset = int(request.args.get("offset", "0"))
+      limit = request.args.get("limit")
+      limit = int(limit) if limit is not None else None
+   except ValueError as e:
+      return jsonify({"error": str(e)}), 400
+   if offset < 0 or (limit is not None and limit < 0):
+      return jsonify({"error": "'offset' and 'limit' must be >= 0"}), 400
+
+   try:
+      devices, version = tango_manager.inventory.match(pattern, regex, refresh)
+   except re.error as e:
+      return jsonify({"error": f"Invalid regex: {e}"}), 400
+   except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+   total = len(devices)
+   devices = devices[offset:offset + limit] if limit is not None else devices[offset:]
+   response = jsonify(devices)
+   response.headers["X-Total-Count"] = str(total)
+   response.set_etag(hashlib.sha1(f"{version}?{request.query_string.decode()}".encode()).hexdigest())
+   return response.make_conditional(request)
 
 
 @app.route("/device")
@@ -0,0 +1,121 @@
+"""
+Logging of Tango events shared by the testing blueprint and the standalone
+manager apps: the "tango_events" logger, lazy value formatting and
+per-attribute sampling of event lines.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+# Level of the "tango_events" logger: events are logged at INFO, event
+# errors at WARNING, so EVENT_LOG_LEVEL=WARNING silences the event lines
+EVENT_LOG_LEVEL = os.getenv("EVENT_LOG_LEVEL", "INFO").upper()
+# At most this many event lines per attribute and second (0 = no limit)
+EVENT_LOG_RATE_PER_S = float(os.getenv("EVENT_LOG_RATE_PER_S", "1"))
+# Only consider every Nth event of an attribute for logging (1 = all)
+EVENT_LOG_SAMPLE_EVERY = int(os.getenv("EVENT_LOG_SAMPLE_EVERY", "1"))
+# Values are cut to this many characters in the log
+EVENT_LOG_VALUE_CHARS = int(os.getenv("EVENT_LOG_VALUE_CHARS", "200"))
+
+event_logger = logging.getLogger("tango_events")
+event_logger.setLevel(EVENT_LOG_LEVEL)
+if not event_logger.handlers:
+    _event_log_handler = logging.StreamHandler(sys.stdout)
+    _event_log_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+    )
+    event_logger.addHandler(_event_log_handler)
+    event_logger.propagate = False
+
+
+class LogValue:
+    """
+    Defers repr() of an attribute value until a handler actually formats
+    the record, and keeps large spectrum/image values to a short prefix.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        text = repr(self.value)
+        if len(text) > EVENT_LOG_VALUE_CHARS:
+            text = f"{text[:EVENT_LOG_VALUE_CHARS]}... ({len(text)} chars)"
+        return text
+
+
+class EventLogSampler:
+    """
+    Per-attribute sampling and rate limiting of event log lines: only every
+    `sample_every`-th event is a candidate, and candidates are let through a
+    token bucket refilled at `rate_per_s`. admit() returns None for an event
+    that should not be logged, otherwise how many were skipped since the
+    last logged one.
+    """
+
+    def __init__(self, rate_per_s: float = EVENT_LOG_RATE_PER_S,
+                 sample_every: int = EVENT_LOG_SAMPLE_EVERY):
+        self.rate_per_s = rate_per_s
+        self.sample_every = max(1, sample_every)
+        self._burst = max(1.0, rate_per_s)
+        self._state = {}  # key -> [seen, tokens, last_refill, skipped]
+        self._lock = threading.Lock()
+
+    def admit(self, key, now: float):
+        """
+        `now` is a monotonic clock reading.
+        """
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                state = self._state[key] = [0, self._burst, now, 0]
+            state[0] += 1
+            if (state[0] - 1) % self.sample_every:
+                state[3] += 1
+                return None
+            if self.rate_per_s > 0:
+                state[1] = min(self._burst, state[1] + (now - state[2]) * self.rate_per_s)
+                state[2] = now
+                if state[1] < 1.0:
+                    state[3] += 1
+                    return None
+                state[1] -= 1.0
+            skipped, state[3] = state[3], 0
+            return skipped
+
+    def forget(self, key):
+        with self._lock:
+            self._state.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._state.clear()
+
+
+def event_time(evt):
+    """
+    Epoch seconds of a Tango event: the attribute value's own timestamp,
+    else the time the client library received the event.
+    """
+    attr_value = evt.attr_value
+    if attr_value is not None and attr_value.time is not None:
+        return attr_value.time.totime()
+    if evt.reception_date is not None:
+        return evt.reception_date.totime()
+    return time.time()
+
+
+def log_event(sampler, level: int, key, fmt: str, *args, **extra):
+    """
+    Log one event line on event_logger if `level` is enabled and `sampler`
+    admits it for `key`; " (N skipped)" is appended to the message. The
+    keyword arguments become the record's `extra` fields.
+    """
+    if not event_logger.isEnabledFor(level):
+        return
+    skipped = sampler.admit(key, time.monotonic())
+    if skipped is not None:
+        event_logger.log(level, fmt + " (%d skipped)", *args, skipped, extra=extra or None)
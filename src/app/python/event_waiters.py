@@ -0,0 +1,89 @@
+"""
+Event waiters keyed by (device, attribute), shared by the testing blueprint
+and the standalone manager apps.
+"""
+import threading
+import time
+
+
+class _EventWaiter:
+    """
+    One blocked caller. The predicate is evaluated by the notifying thread,
+    and the caller is only woken once it returns True.
+    """
+    __slots__ = ("predicate", "event", "value", "matched_at")
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+        self.event = threading.Event()
+        self.value = None
+        self.matched_at = None
+
+
+class EventWaiterRegistry:
+    """
+    Blocked callers keyed by (device, attribute).
+
+    The event callback calls `notify` for the key that received an event, so
+    only the waiters of that key get their predicate evaluated. Waiting
+    callers sleep on their own threading.Event, so an idle waiter costs no
+    CPU no matter how many of them there are.
+    """
+    def __init__(self):
+        self._waiters = {}
+        self._lock = threading.Lock()
+
+    def register(self, key, predicate):
+        waiter = _EventWaiter(predicate)
+        with self._lock:
+            self._waiters.setdefault(key, []).append(waiter)
+        return waiter
+
+    def cancel(self, key, waiter):
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    def notify(self, key, value, previous_value=None):
+        """
+        Wake every waiter of `key` whose predicate accepts the new value.
+        """
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if not waiters:
+                return
+            remaining = []
+            for waiter in waiters:
+                try:
+                    done = waiter.predicate(value, previous_value)
+                except Exception:
+                    done = False
+                if done:
+                    waiter.value = value
+                    waiter.matched_at = time.monotonic()
+                    waiter.event.set()
+                else:
+                    remaining.append(waiter)
+            if remaining:
+                self._waiters[key] = remaining
+            else:
+                del self._waiters[key]
+
+    def wait(self, waiter, key, timeout_s: float):
+        """
+        Block until `waiter` has been notified or `timeout_s` elapses.
+        Returns the matching value or raises TimeoutError.
+        """
+        try:
+            if not waiter.event.wait(timeout_s):
+                raise TimeoutError(f"No matching event within {timeout_s} seconds.")
+            return waiter.value
+        finally:
+            self.cancel(key, waiter)
+
+    def waiting_count(self):
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
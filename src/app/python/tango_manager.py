@@ -1,9 +1,16 @@
 from flask import Flask, request, jsonify
 import tango
 import threading
+import logging
+try:
+    from .event_logging import EventLogSampler, LogValue, event_time, log_event
+except ImportError:
+    # Run as a script from this directory
+    from event_logging import EventLogSampler, LogValue, event_time, log_event
 
 app = Flask(__name__)
 
+
 ###############################################################################
 # GLOBAL / SINGLETON TANGO MANAGER
 ###############################################################################
@@ -30,6 +37,7 @@ class TangoManager:
         """
         self.devices = {}
         self.lock = threading.Lock()
+        self.event_log_sampler = EventLogSampler()
 
     def _get_or_create_device_proxy(self, device_name):
         """
@@ -63,9 +71,13 @@ class TangoManager:
             in dev_entry["latest_events"] for retrieval.
             """
             if evt.err:
-                print(f"[ERROR] {full_attr_name} => {evt.errors}")
+                log_event(self.event_log_sampler, logging.WARNING, full_attr_name,
+                          "event error %s => %s", full_attr_name, evt.errors,
+                          device=device_name, attribute=attribute_name)
             else:
-                print(f"[EVENT] {full_attr_name} => {evt.attr_value.value}")
+                log_event(self.event_log_sampler, logging.INFO, full_attr_name,
+                          "event %s => %s", full_attr_name, LogValue(evt.attr_value.value),
+                          device=device_name, attribute=attribute_name, event_time=event_time(evt))
 
                 # Save to latest_events
                 dev_entry["latest_events"][attribute_name] = evt.attr_value.value
@@ -92,6 +104,7 @@ class TangoManager:
             event_id = subs[attribute_name]
             dev_entry["proxy"].unsubscribe_event(event_id)
             del subs[attribute_name]
+            self.event_log_sampler.forget(f"{dev_entry['proxy'].name}/{attribute_name}")
             print(f"Unsubscribed from {device_name}/{attribute_name}, event ID: {event_id}")
 
     def run_command(self, device_name: str, command_name: str, args=None):
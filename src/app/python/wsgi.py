@@ -1,11 +1,24 @@
 from flask import Flask, request, jsonify
 import tango
 import threading
+import logging
 import time
 import datetime
+from collections import deque
+try:
+    from .event_logging import EventLogSampler, LogValue, event_time, log_event
+    from .event_waiters import EventWaiterRegistry
+except ImportError:
+    # Run as a script from this directory
+    from event_logging import EventLogSampler, LogValue, event_time, log_event
+    from event_waiters import EventWaiterRegistry
+
+# Number of events kept in the global event log
+EVENT_LOG_MAXLEN = 10000
 
 app = Flask(__name__)
 
+
 ###############################################################################
 # GLOBAL / SINGLETON TANGO MANAGER
 ###############################################################################
@@ -34,7 +47,9 @@ class TangoManager:
               ...
             }
         
-        2) A global list of all event logs: a list of dict, each containing:
+        2) A bounded log of the last EVENT_LOG_MAXLEN events, each a dict
+           (the timestamp is kept as epoch seconds and only turned into
+           ISO-8601 by get_event_logs()):
             {
               "timestamp": ...,
               "device": ...,
@@ -43,8 +58,11 @@ class TangoManager:
             }
         """
         self.devices = {}
-        self.event_logs = []  # list of dict
+        self.event_logs = deque(maxlen=EVENT_LOG_MAXLEN)  # of dict
         self.lock = threading.Lock()
+        # Callers of wait_for_next_event, woken per (device, attribute)
+        self.waiters = EventWaiterRegistry()
+        self.event_log_sampler = EventLogSampler()
 
     def reset(self):
         """
@@ -58,6 +76,7 @@ class TangoManager:
                     dev_entry["proxy"].unsubscribe_event(event_id)
             self.devices.clear()
             self.event_logs.clear()
+            self.event_log_sampler.clear()
 
     def _get_or_create_device_entry(self, device_name):
         """
@@ -92,13 +111,17 @@ class TangoManager:
             Callback for receiving events. We'll store the last known value
             in dev_entry["latest_events"] and also log it in self.event_logs.
             """
-            timestamp = datetime.datetime.now().isoformat()
             if evt.err:
-                print(f"[ERROR] {full_attr_name} => {evt.errors}")
+                log_event(self.event_log_sampler, logging.WARNING, full_attr_name,
+                          "event error %s => %s", full_attr_name, evt.errors,
+                          device=device_name, attribute=attribute_name)
                 # (Optional) You could also store error logs, if needed
             else:
                 value = evt.attr_value.value
-                print(f"[EVENT] {full_attr_name} => {value}")
+                timestamp = event_time(evt)
+                log_event(self.event_log_sampler, logging.INFO, full_attr_name,
+                          "event %s => %s", full_attr_name, LogValue(value),
+                          device=device_name, attribute=attribute_name, event_time=timestamp)
 
                 with self.lock:
                     # Update the last known value
@@ -114,6 +137,7 @@ class TangoManager:
                         "attribute": attribute_name,
                         "value": value
                     })
+                self.waiters.notify((device_name, attribute_name), value)
 
         # Actually subscribe
         event_id = proxy.subscribe_event(
@@ -137,6 +161,7 @@ class TangoManager:
             event_id = subs[attribute_name]
             dev_entry["proxy"].unsubscribe_event(event_id)
             del subs[attribute_name]
+            self.event_log_sampler.forget(f"{dev_entry['proxy'].name}/{attribute_name}")
             print(f"Unsubscribed from {device_name}/{attribute_name}, event ID: {event_id}")
 
     def run_command(self, device_name: str, command_name: str, args=None):
@@ -162,8 +187,11 @@ class TangoManager:
         Return the entire event log as a list.
         """
         with self.lock:
-            # Return a shallow copy or you can return it directly
-            return list(self.event_logs)
+            logs = list(self.event_logs)
+        return [
+            dict(entry, timestamp=datetime.datetime.fromtimestamp(entry["timestamp"]).isoformat())
+            for entry in logs
+        ]
 
     def wait_for_next_event(self, device_name: str, attribute_name: str, timeout_s: float = 30.0):
         """
@@ -172,24 +200,19 @@ class TangoManager:
         a timeout exception.
 
         Implementation detail:
-        We store the current event_count for that device/attribute, then
-        poll in a loop for a change in that count. A more robust approach
-        is to use a threading.Condition, but this is simpler to illustrate.
+        We register a waiter for that device/attribute only; the event
+        callback wakes the waiters of the attribute it received an event
+        for, so events of other attributes never wake this caller.
         """
-        dev_entry = self._get_or_create_device_entry(device_name)
-        start_time = time.time()
-
-        # Snapshot current event count
-        initial_count = dev_entry["event_count"].get(attribute_name, 0)
+        self._get_or_create_device_entry(device_name)
 
-        while True:
-            time.sleep(0.1)  # poll interval
-            current_count = dev_entry["event_count"].get(attribute_name, 0)
-            if current_count > initial_count:
-                # A new event has arrived
-                return True
-            if (time.time() - start_time) > timeout_s:
-                raise TimeoutError(f"No new event within {timeout_s} seconds.")
+        key = (device_name, attribute_name)
+        waiter = self.waiters.register(key, lambda value, previous_value: True)
+        try:
+            self.waiters.wait(waiter, key, timeout_s)
+        except TimeoutError:
+            raise TimeoutError(f"No new event within {timeout_s} seconds.")
+        return True
 
 
 ###############################################################################
@@ -308,8 +331,8 @@ def reset_client():
 @app.route("/event_logs", methods=["GET"])
 def event_logs():
     """
-    Return the full list of event logs. You might want to add filtering,
-    pagination, or a limit on how many logs to keep in memory.
+    Return the event log (the last EVENT_LOG_MAXLEN events). You might
+    want to add filtering or pagination.
     """
     logs = tango_manager.get_event_logs()
     return jsonify({"event_logs": logs}), 200
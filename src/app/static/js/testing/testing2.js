@@ -1,3 +1,14 @@
+// Identifies this browser tab to the server as the holder of its shared
+// subscriptions (kept across reloads of the tab)
+function tangoClientId() {
+  let clientId = sessionStorage.getItem("tangoClientId");
+  if (!clientId) {
+    clientId = "ui-" + Date.now().toString(36) + "-" + Math.random().toString(36).slice(2, 10);
+    sessionStorage.setItem("tangoClientId", clientId);
+  }
+  return clientId;
+}
+
 class TangoAttributeNode extends LGraphNode {
     constructor() {
       super();
@@ -335,18 +346,18 @@ class DeviceSubscriptionNode extends LGraphNode {
 
         fetch("/module1/subscribe_event", {
             method: "POST",
-            headers: { "Content-Type": "application/json" },
+            headers: { "Content-Type": "application/json", "X-Client-Id": tangoClientId() },
             body: JSON.stringify(newSubscriptions)
         })
         .then((response) => response.json())
         .then((data) => {
-            // data can be an array of subscription statuses or an error object
+            // data holds the subscription statuses or is an error object
             this.setOutputData(0, JSON.stringify(data)); // Send the raw response to the output port
 
-            if (Array.isArray(data)) {
+            if (Array.isArray(data.subscriptions)) {
                 // We have a list of subscription results
                 let anyError = false;
-                data.forEach(sub => {
+                data.subscriptions.forEach(sub => {
                     if (sub.status === "subscribed") {
                         console.log(`Subscribed to ${sub.device}/${sub.attribute}`);
                     } else if (sub.status === "error") {
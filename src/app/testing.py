@@ -149,24 +149,6 @@ def get_obs_state_value(value_str):
     # return ObsState[value_str.upper()]
     pass
 
-@module1.route('/assert_in', methods=['POST'])
-def assert_in_test():
-    data  = request.json
-    
-    
-    description = data.get('description', '')
-    assertions = data.get('assertions', [])
-    print("assertions", assertions)
-    results={}
-    i=0
-    for entry in assertions:
-        dev=tango.DeviceProxy(entry["device"])
-        attribute=dev.read_attribute(entry["attribute_name"]).value
-        entry["result"]=str(attribute==entry["value"])
-        results[str(i)]=entry
-    print(results)
-    return jsonify(results)
-
 @module1.route('/attribute_value', methods=['POST'])
 def get_attribute_info():
     # Get the JSON data from the request
@@ -186,18 +168,1641 @@ def get_attribute_info():
 #////////////////////////////////////////////////////////////////////
 #////////////////////////////////tango manager///////////////////////
 #////////////////////////////////////////////////////////////////////
+import io
+import os
+import re
+import sys
 import json
 import time
+import uuid
+import base64
+import random
+import hashlib
+import heapq
+import array
+import fnmatch
+import logging
 import datetime
 import threading
-from collections import deque
-from flask import Blueprint, request, jsonify
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from flask import Blueprint, Response, request, jsonify
+import numpy
+from .python.event_logging import EventLogSampler, LogValue, event_logger, event_time, log_event
+from .python.event_waiters import EventWaiterRegistry
 
 # For the Tango imports, ensure PyTango is installed:
 # import tango  # Uncomment if you have the tango library available
 
 module1 = Blueprint("module1", __name__)
 
+###############################################################################
+# Event waiters
+###############################################################################
+def _values_match(actual, expected):
+    """
+    Compare an attribute value coming from Tango with a value coming from a
+    client (JSON body or query string). Arrays are compared as lists, and we
+    fall back to comparing string forms so that e.g. DevState.ON matches "ON"
+    and 2 matches "2".
+    """
+    if hasattr(actual, "tolist"):
+        actual = actual.tolist()
+    try:
+        if actual == expected:
+            return True
+    except Exception:
+        pass
+    return str(actual) == str(expected)
+
+
+def make_event_predicate(condition: str = "next", value=None, count: int = 1, previous_value=None):
+    """
+    Build a predicate(value, previous_value) -> bool for EventWaiterRegistry.
+
+    condition:
+      "next"          -> the next event, whatever its value
+      "count"         -> after `count` more events
+      "equals"        -> an event whose value matches `value`
+      "changed_from"  -> an event whose value no longer matches `value`
+      "transition"    -> an event whose value matches `value` while the
+                         value before it matched `previous_value`
+    """
+    if condition in ("next", "count"):
+        remaining = [max(int(count), 1) if condition == "count" else 1]
+
+        def _predicate(new_value, previous_value):
+            remaining[0] -= 1
+            return remaining[0] <= 0
+        return _predicate
+    if condition == "equals":
+        return lambda new_value, previous_value: _values_match(new_value, value)
+    if condition == "changed_from":
+        return lambda new_value, previous_value: not _values_match(new_value, value)
+    if condition == "transition":
+        expected_previous = previous_value
+        return lambda new_value, previous_value: (
+            _values_match(new_value, value) and _values_match(previous_value, expected_previous)
+        )
+    raise ValueError(f"Unknown wait condition '{condition}'")
+
+
+###############################################################################
+# Event records
+###############################################################################
+class EventRecord(namedtuple("EventRecord", "seq timestamp device attribute value")):
+    """
+    One entry of the event log. Kept as a tuple (epoch timestamp, interned
+    device/attribute names) and only turned into a dict when serialized.
+    """
+    __slots__ = ()
+
+    def to_dict(self, encoding: str = "json"):
+        return {
+            "seq": self.seq,
+            "timestamp": datetime.datetime.fromtimestamp(self.timestamp).isoformat(),
+            "device": self.device,
+            "attribute": self.attribute,
+            "value": _encode_value(self.value, encoding)
+        }
+
+
+###############################################################################
+# Event streams (Server-Sent Events)
+###############################################################################
+# Events buffered per stream before the oldest ones are dropped
+EVENT_STREAM_QUEUE_SIZE = 1000
+# Seconds of silence after which a keep-alive comment is sent
+EVENT_STREAM_KEEPALIVE_S = 15.0
+
+
+class _EventStream:
+    """
+    One connected client: a device/attribute glob filter and a bounded
+    queue of pending EventRecords.
+    """
+    def __init__(self, device_pattern: str, attribute_pattern: str, queue_size: int):
+        self.device_pattern = device_pattern.lower()
+        self.attribute_pattern = attribute_pattern.lower()
+        self.queue = deque(maxlen=queue_size)
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+    def matches(self, device_name: str, attribute_name: str):
+        return (fnmatch.fnmatchcase(device_name.lower(), self.device_pattern)
+                and fnmatch.fnmatchcase(attribute_name.lower(), self.attribute_pattern))
+
+    def push(self, entry):
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(entry)
+            self.condition.notify()
+
+    def drain(self, timeout_s: float):
+        """
+        Wait up to `timeout_s` for entries, then hand back everything queued
+        plus the number of entries dropped since the last drain.
+        """
+        with self.condition:
+            if not self.queue:
+                self.condition.wait(timeout_s)
+            entries = list(self.queue)
+            self.queue.clear()
+            dropped, self.dropped = self.dropped, 0
+        return entries, dropped
+
+
+class EventBroadcaster:
+    """
+    Fans every recorded event out to the connected streams whose filter
+    matches. A slow client only ever fills its own bounded queue.
+    """
+    def __init__(self, queue_size: int = EVENT_STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._streams = []
+        self._lock = threading.Lock()
+
+    def open(self, device_pattern: str = "*", attribute_pattern: str = "*"):
+        stream = _EventStream(device_pattern, attribute_pattern, self.queue_size)
+        with self._lock:
+            self._streams.append(stream)
+        return stream
+
+    def close(self, stream):
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+    def publish(self, entry):
+        with self._lock:
+            streams = list(self._streams)
+        for stream in streams:
+            if stream.matches(entry.device, entry.attribute):
+                stream.push(entry)
+
+    def stream_count(self):
+        with self._lock:
+            return len(self._streams)
+
+
+###############################################################################
+# Per-attribute event history
+###############################################################################
+# Default retention of every (device, attribute) history; 0 disables the age limit
+HISTORY_MAX_SAMPLES = int(os.getenv("HISTORY_MAX_SAMPLES", "10000"))
+HISTORY_MAX_AGE_S = float(os.getenv("HISTORY_MAX_AGE_S", "0"))
+# Default cap for histories of values stored as whole objects (spectrum,
+# image, string...), which cost far more per sample than numeric ones
+HISTORY_MAX_OBJECT_SAMPLES = int(os.getenv("HISTORY_MAX_OBJECT_SAMPLES", "100"))
+
+
+# array typecodes used for compact value storage
+_BOOL_TYPECODE = "b"
+_INT_TYPECODE = "q"
+_FLOAT_TYPECODE = "d"
+
+
+def _compact_typecode(value):
+    """
+    Pick the array typecode able to hold `value`, or None when the value has
+    to be kept as a Python object (strings, arrays, DevState, ...).
+    Enum values (int subclasses such as IntEnum) are stored as integers.
+    """
+    if type(value) is bool or type(value).__name__ == "bool_":
+        return _BOOL_TYPECODE
+    if type(value) is float or type(value).__name__ in ("float64", "float32", "float16"):
+        return _FLOAT_TYPECODE
+    if isinstance(value, int) or type(value).__name__ in (
+            "int8", "int16", "int32", "int64", "uint8", "uint16", "uint32"):
+        return _INT_TYPECODE
+    return None
+
+
+class AttributeHistory:
+    """
+    Ring buffer of (epoch timestamp, value) samples for one attribute.
+
+    Samples are kept oldest first in logical order; `_start` is the physical
+    index of the oldest one. Timestamps are non-decreasing, so range lookups
+    are a binary search over the logical indices: a sample older than the
+    newest one (device clocks, several event types and polls feed the same
+    history) is stored at the newest timestamp instead.
+
+    Timestamps live in a float64 array. Numeric, boolean and enum values
+    live in a typed array as well (16 bytes per sample instead of a dict per
+    event); the first value that does not fit switches the history over to a
+    plain list of objects, which keeps at most `max_object_samples` samples.
+    """
+    def __init__(self, max_samples: int, max_age_s: float = 0, max_object_samples: int = None):
+        self.max_samples = max(int(max_samples), 1)
+        self.max_age_s = max_age_s
+        self.max_object_samples = max_object_samples
+        self._timestamps = array.array(_FLOAT_TYPECODE)
+        self._values = None
+        self._typecode = None
+        # enum member for each integer stored, so reads give back the enum
+        self._enum_members = None
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _index(self, i):
+        return (self._start + i) % len(self._timestamps)
+
+    def _capacity(self):
+        if self._typecode is not None or self.max_object_samples is None:
+            return self.max_samples
+        return max(min(self.max_samples, int(self.max_object_samples)), 1)
+
+    def _ordered(self, buffer):
+        end = self._start + self._size
+        if end <= len(buffer):
+            return buffer[self._start:end]
+        return buffer[self._start:] + buffer[:end - len(buffer)]
+
+    def _linearize(self):
+        """
+        Rotate the buffer so the oldest sample sits at physical index 0 and
+        drop the free slots after the newest one.
+        """
+        if self._values is None:
+            return
+        self._timestamps = self._ordered(self._timestamps)
+        self._values = self._ordered(self._values)
+        self._start = 0
+
+    def _encode(self, value):
+        """
+        Turn `value` into what gets stored in self._values, switching the
+        storage to a list of objects if it does not fit the typed array.
+        """
+        if self._values is None:
+            self._typecode = _compact_typecode(value)
+            self._values = array.array(self._typecode) if self._typecode else []
+        if self._typecode is None:
+            return value
+        if _compact_typecode(value) == self._typecode:
+            if self._typecode == _INT_TYPECODE:
+                if type(value) is not int and isinstance(value, int):
+                    if self._enum_members is None:
+                        self._enum_members = {}
+                    self._enum_members[int(value)] = value
+                if -2 ** 63 <= value < 2 ** 63:
+                    return int(value)
+            else:
+                return value
+        self._values = [self._decode(v) for v in self._values]
+        self._typecode = None
+        # Stored values are the objects themselves from now on
+        self._enum_members = None
+        self._trim()
+        return value
+
+    def _decode(self, stored):
+        if self._typecode == _BOOL_TYPECODE:
+            return bool(stored)
+        if self._enum_members:
+            return self._enum_members.get(stored, stored)
+        return stored
+
+    def append(self, timestamp: float, value):
+        if self._size:
+            timestamp = max(timestamp, self._timestamps[self._index(self._size - 1)])
+        value = self._encode(value)
+        if self._size == len(self._timestamps):
+            if self._size < self._capacity():
+                if self._start:
+                    self._linearize()
+                self._timestamps.append(timestamp)
+                self._values.append(value)
+                self._size += 1
+            else:
+                # Full: overwrite the oldest sample
+                self._timestamps[self._start] = timestamp
+                self._values[self._start] = value
+                self._start = (self._start + 1) % len(self._timestamps)
+        else:
+            i = self._index(self._size)
+            self._timestamps[i] = timestamp
+            self._values[i] = value
+            self._size += 1
+        self.prune(timestamp)
+
+    def prune(self, now: float):
+        """
+        Drop the samples older than max_age_s (if an age limit is set).
+        """
+        if not self.max_age_s or not self._size:
+            return
+        cut = self.bisect(now - self.max_age_s)
+        if cut:
+            self._start = self._index(cut) if cut < self._size else 0
+            self._size -= cut
+
+    def resize(self, max_samples: int, max_object_samples: int = None):
+        self.max_samples = max(int(max_samples), 1)
+        self.max_object_samples = max_object_samples
+        self._trim()
+
+    def _trim(self):
+        """
+        Drop the oldest samples beyond the current capacity.
+        """
+        if self._values is None:
+            return
+        self._linearize()
+        excess = max(self._size - self._capacity(), 0)
+        self._timestamps = self._timestamps[excess:]
+        self._values = self._values[excess:]
+        self._size -= excess
+
+    def bisect(self, timestamp: float, right: bool = False):
+        """
+        Logical index of the first sample with a timestamp >= `timestamp`
+        (> `timestamp` when right=True).
+        """
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self._timestamps[self._index(mid)]
+            if t < timestamp or (right and t == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, t_from: float = None, t_to: float = None, limit: int = None):
+        """
+        Samples with t_from <= timestamp <= t_to, oldest first.
+        """
+        lo = self.bisect(t_from) if t_from is not None else 0
+        hi = self.bisect(t_to, right=True) if t_to is not None else self._size
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [(self._timestamps[self._index(i)], self._decode(self._values[self._index(i)]))
+                for i in range(lo, hi)]
+
+    def sample(self, i: int):
+        """
+        The (timestamp, value) sample at logical index `i` (0 is the oldest).
+        """
+        return self._timestamps[self._index(i)], self._decode(self._values[self._index(i)])
+
+    def nbytes(self):
+        """
+        Approximate memory held by the buffers themselves.
+        """
+        size = self._timestamps.itemsize * len(self._timestamps)
+        if isinstance(self._values, array.array):
+            size += self._values.itemsize * len(self._values)
+        elif self._values is not None:
+            size += sys.getsizeof(self._values)
+        return size
+
+
+class EventHistoryStore:
+    """
+    One AttributeHistory per (device, attribute), so a noisy attribute only
+    ever evicts its own samples. Retention defaults to HISTORY_MAX_SAMPLES /
+    HISTORY_MAX_AGE_S (HISTORY_MAX_OBJECT_SAMPLES for object values) and can
+    be overridden per attribute; an attribute's own max_samples applies to
+    object values as well.
+    """
+    def __init__(self, max_samples: int = HISTORY_MAX_SAMPLES, max_age_s: float = HISTORY_MAX_AGE_S,
+                 max_object_samples: int = HISTORY_MAX_OBJECT_SAMPLES):
+        self.max_samples = max_samples
+        self.max_age_s = max_age_s
+        self.max_object_samples = max_object_samples
+        self._histories = {}
+        self._overrides = {}
+        self._lock = threading.Lock()
+
+    def _retention(self, key):
+        """
+        (max_samples, max_age_s, max_object_samples) of an attribute.
+        """
+        max_samples, max_age_s = self._overrides.get(key, (None, None))
+        if max_samples is not None:
+            return max_samples, max_age_s if max_age_s is not None else self.max_age_s, max_samples
+        return (self.max_samples, max_age_s if max_age_s is not None else self.max_age_s,
+                self.max_object_samples)
+
+    def append(self, device_name: str, attribute_name: str, timestamp: float, value):
+        key = (device_name, attribute_name)
+        with self._lock:
+            history = self._histories.get(key)
+            if history is None:
+                key = (sys.intern(device_name), sys.intern(attribute_name))
+                history = self._histories[key] = AttributeHistory(*self._retention(key))
+            history.append(timestamp, value)
+
+    def query(self, device_name: str, attribute_name: str,
+              t_from: float = None, t_to: float = None, limit: int = None):
+        """
+        Return the (timestamp, value) samples of one attribute in a time
+        range, oldest first. Unknown attributes give an empty list.
+        """
+        with self._lock:
+            history = self._histories.get((device_name, attribute_name))
+            if history is None:
+                return []
+            history.prune(time.time())
+            return history.range(t_from, t_to, limit)
+
+    def sample_before(self, device_name: str, attribute_name: str, timestamp: float):
+        """
+        The last (timestamp, value) sample strictly older than `timestamp`,
+        or None.
+        """
+        with self._lock:
+            history = self._histories.get((device_name, attribute_name))
+            if history is None:
+                return None
+            i = history.bisect(timestamp)
+            return history.sample(i - 1) if i else None
+
+    def configure(self, device_name: str = None, attribute_name: str = None,
+                  max_samples: int = None, max_age_s: float = None):
+        """
+        Change retention for one attribute, or the defaults (which apply to
+        every attribute without an override) when neither device nor
+        attribute is given. Giving only one of them raises ValueError.
+        """
+        if bool(device_name) != bool(attribute_name):
+            raise ValueError("Give both 'device' and 'attribute', or neither")
+        with self._lock:
+            if device_name and attribute_name:
+                key = (device_name, attribute_name)
+                old_samples, old_age = self._overrides.get(key, (None, None))
+                self._overrides[key] = (
+                    max_samples if max_samples is not None else old_samples,
+                    max_age_s if max_age_s is not None else old_age
+                )
+                keys = [key] if key in self._histories else []
+            else:
+                if max_samples is not None:
+                    self.max_samples = max_samples
+                if max_age_s is not None:
+                    self.max_age_s = max_age_s
+                keys = [key for key in self._histories if key not in self._overrides]
+            for key in keys:
+                history = self._histories[key]
+                samples, age, object_samples = self._retention(key)
+                if (samples, object_samples) != (history.max_samples, history.max_object_samples):
+                    history.resize(samples, object_samples)
+                history.max_age_s = age
+                history.prune(time.time())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "attributes": len(self._histories),
+                "samples": sum(len(history) for history in self._histories.values()),
+                "buffer_bytes": sum(history.nbytes() for history in self._histories.values()),
+                "default_max_samples": self.max_samples,
+                "default_max_object_samples": self.max_object_samples,
+                "default_max_age_s": self.max_age_s
+            }
+
+    def clear(self):
+        with self._lock:
+            self._histories.clear()
+
+
+###############################################################################
+# Multi-device fan-out
+###############################################################################
+# Worker threads shared by every request that talks to many devices at once
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "32"))
+# Default deadline (seconds) for a whole multi-device request
+FANOUT_DEADLINE_S = float(os.getenv("FANOUT_DEADLINE_S", "10"))
+
+# Seconds a wildcard device group stays resolved before asking the database again
+GROUP_CACHE_TTL_S = float(os.getenv("GROUP_CACHE_TTL_S", "60"))
+# Most wildcard groups kept resolved; the least recently used go beyond this
+GROUP_CACHE_MAX = int(os.getenv("GROUP_CACHE_MAX", "256"))
+
+# DevFailed reasons meaning the device itself is unreachable, as opposed to a
+# problem with one particular attribute
+_CONNECTION_FAILURE_REASONS = (
+    "API_CantConnectToDevice",
+    "API_DeviceNotExported",
+    "API_DeviceTimedOut",
+    "API_CorbaException",
+    "API_CommunicationFailed",
+    "DB_DeviceNotDefined",
+)
+
+
+def _devfailed_reason(error):
+    """
+    Return the reason of the first error of a tango.DevFailed, or "".
+    """
+    try:
+        return error.args[0].reason
+    except (AttributeError, IndexError):
+        return ""
+
+
+###############################################################################
+# Single-flight
+###############################################################################
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution: the
+    first caller runs the function, later callers block on its Future and
+    get the same result (or exception). Nothing is cached once the call
+    has finished.
+    """
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+###############################################################################
+# Asynchronous command jobs
+###############################################################################
+# Worker threads running asynchronous commands
+COMMAND_WORKERS = int(os.getenv("COMMAND_WORKERS", "16"))
+# Most jobs remembered at once, and how long finished jobs are kept (seconds)
+COMMAND_JOB_MAX = int(os.getenv("COMMAND_JOB_MAX", "1000"))
+COMMAND_JOB_TTL_S = float(os.getenv("COMMAND_JOB_TTL_S", "600"))
+
+
+class CommandJobTable:
+    """
+    Runs commands on a dedicated worker pool and keeps track of them by
+    job ID, so a request can return straight away and the result can be
+    collected later.
+
+    The table is bounded: finished jobs expire after `ttl_s`, and when it is
+    full the oldest finished jobs are dropped first. If every slot holds a
+    job that is still queued or running, new submissions are refused.
+    """
+    def __init__(self, max_jobs: int = COMMAND_JOB_MAX, ttl_s: float = COMMAND_JOB_TTL_S,
+                 workers: int = COMMAND_WORKERS):
+        self.max_jobs = max_jobs
+        self.ttl_s = ttl_s
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tango-command")
+
+    def _expire(self, now: float):
+        """
+        Drop expired jobs, then the oldest finished ones while over
+        capacity. Caller holds self._lock.
+        """
+        for job_id, job in list(self._jobs.items()):
+            if job["finished_at"] is not None and now - job["finished_at"] > self.ttl_s:
+                del self._jobs[job_id]
+        for job_id, job in list(self._jobs.items()):
+            if len(self._jobs) < self.max_jobs:
+                break
+            if job["finished_at"] is not None:
+                del self._jobs[job_id]
+
+    def submit(self, func, **description):
+        """
+        Queue func() and return the new job ID. `description` (device,
+        command name, ...) is stored with the job and echoed back in its
+        status.
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        job = dict(
+            description,
+            job_id=job_id,
+            status="queued",
+            submitted_at=now,
+            started_at=None,
+            finished_at=None,
+            result=None,
+            error=None
+        )
+        with self._lock:
+            self._expire(now)
+            if len(self._jobs) >= self.max_jobs:
+                raise RuntimeError(f"Too many pending command jobs ({self.max_jobs})")
+            self._jobs[job_id] = job
+
+        def _run():
+            with self._lock:
+                job["status"] = "running"
+                job["started_at"] = time.time()
+            try:
+                result, error, status = func(), None, "done"
+            except Exception as e:
+                result, error, status = None, str(e), "failed"
+            with self._lock:
+                job.update(result=result, error=error, status=status, finished_at=time.time())
+
+        job["future"] = self.executor.submit(_run)
+        return job_id
+
+    def get(self, job_id: str):
+        """
+        Snapshot of a job's state, or None if unknown or expired.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key != "future"}
+
+    def wait(self, job_id: str, timeout_s: float):
+        """
+        Block until the job finished or `timeout_s` elapsed, then return its
+        snapshot (None if unknown).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            job["future"].result(timeout=timeout_s)
+        except FuturesTimeoutError:
+            pass
+        return self.get(job_id)
+
+    def list(self):
+        with self._lock:
+            self._expire(time.time())
+            return [
+                {key: value for key, value in job.items() if key not in ("future", "result")}
+                for job in self._jobs.values()
+            ]
+
+
+###############################################################################
+# Long running commands
+###############################################################################
+# Attribute on which SKA devices report (command_id, result) once a long
+# running command has finished
+LRC_RESULT_ATTRIBUTE = "longRunningCommandResult"
+# Number of command results remembered
+LRC_RESULTS_MAX = int(os.getenv("LRC_RESULTS_MAX", "10000"))
+
+
+def _lrc_command_id(value):
+    """
+    Command ID of a longRunningCommandResult value ("<id>", "<result>"),
+    or None.
+    """
+    if isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[0], str):
+        return value[0]
+    return None
+
+
+def _lrc_id_from_command_result(result):
+    """
+    Command ID from what a long running command returns when invoked:
+    [[ResultCode], ["<command_id>"]]. None if it doesn't look like one.
+    """
+    try:
+        command_ids = result[1]
+        if len(command_ids) == 1 and isinstance(command_ids[0], str):
+            return command_ids[0]
+    except (TypeError, IndexError, KeyError):
+        pass
+    return None
+
+
+class LongRunningCommandTracker:
+    """
+    Indexes longRunningCommandResult events by command ID so completion of
+    a long running command can be looked up or waited for directly.
+
+    The manager feeds every event of a LRC_RESULT_ATTRIBUTE attribute into
+    `record`; `ensure_subscribed` subscribes a device on demand.
+    """
+    def __init__(self, manager, max_results: int = LRC_RESULTS_MAX):
+        self.manager = manager
+        self.max_results = max_results
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ensure_subscribed(self, device_name: str):
+        self.manager.subscribe_attribute(
+            device_name, LRC_RESULT_ATTRIBUTE, holder=LRC_SUBSCRIPTION_HOLDER
+        )
+
+    def record(self, device_name: str, value, timestamp: float):
+        command_id = _lrc_command_id(value)
+        if command_id is None:
+            return
+        raw_result = value[1]
+        try:
+            decoded = json.loads(raw_result)
+        except (TypeError, ValueError):
+            decoded = None
+        with self._lock:
+            self._results[command_id] = {
+                "command_id": command_id,
+                "device": device_name,
+                "result": raw_result,
+                "decoded": decoded,
+                "timestamp": timestamp
+            }
+            self._results.move_to_end(command_id)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def get(self, command_id: str):
+        with self._lock:
+            result = self._results.get(command_id)
+            return dict(result) if result else None
+
+    def wait_for_command(self, device_name: str, command_id: str, timeout_s: float):
+        """
+        Return the result of `command_id`, waiting up to `timeout_s` for the
+        matching longRunningCommandResult event of `device_name`. Raises
+        TimeoutError if it doesn't arrive in time.
+        """
+        key = (device_name, LRC_RESULT_ATTRIBUTE)
+        waiter = self.manager.waiters.register(
+            key, lambda value, previous_value: _lrc_command_id(value) == command_id
+        )
+        try:
+            self.ensure_subscribed(device_name)
+            result = self.get(command_id)
+            if result is not None:
+                return result
+            self.manager.waiters.wait(waiter, key, timeout_s)
+        finally:
+            self.manager.waiters.cancel(key, waiter)
+        # The manager records the event before notifying the waiters
+        return self.get(command_id)
+
+
+###############################################################################
+# Attribute read cache
+###############################################################################
+# Seconds a polled attribute value may be served again without a new read
+# (overridable per attribute; 0 disables caching of polled reads)
+READ_CACHE_TTL_S = float(os.getenv("READ_CACHE_TTL_S", "0.5"))
+# Most polled values kept
+READ_CACHE_MAX = int(os.getenv("READ_CACHE_MAX", "10000"))
+
+
+class AttributeReadCache:
+    """
+    Last polled value of each (device, attribute) with the time it was
+    read. Entries are served while younger than the attribute's TTL.
+    """
+    def __init__(self, default_ttl_s: float = READ_CACHE_TTL_S, max_entries: int = READ_CACHE_MAX):
+        self.default_ttl_s = default_ttl_s
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._ttls = {}
+        self._lock = threading.Lock()
+
+    def ttl(self, key):
+        return self._ttls.get(key, self.default_ttl_s)
+
+    def set_ttl(self, key, ttl_s: float):
+        with self._lock:
+            if ttl_s is None:
+                self._ttls.pop(key, None)
+            else:
+                self._ttls[key] = ttl_s
+
+    def get(self, key, max_age_s: float = None):
+        """
+        Return (value, read_at) if the cached read is younger than
+        `max_age_s` (default: the attribute's TTL), else None.
+        """
+        max_age_s = self.ttl(key) if max_age_s is None else max_age_s
+        if max_age_s <= 0:
+            return None
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is None or time.time() - cached[1] > max_age_s:
+            return None
+        return cached
+
+    def put(self, key, value, read_at: float):
+        with self._lock:
+            self._entries[key] = (value, read_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_device(self, device_name: str):
+        """
+        Drop every cached read of a device, e.g. after a command that may
+        have changed its attributes.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == device_name]:
+                del self._entries[key]
+
+
+###############################################################################
+# Request coalescing
+###############################################################################
+# Commands without side effects: identical concurrent calls (same device, no
+# arguments) share one command_inout
+COALESCED_COMMANDS = {
+    name.strip().lower()
+    for name in os.getenv("COALESCED_COMMANDS", "State,Status").split(",")
+    if name.strip()
+}
+
+
+###############################################################################
+# Exported device inventory
+###############################################################################
+# Seconds the exported-device list is reused before asking the database again
+TANGO_INVENTORY_TTL_S = float(os.getenv("TANGO_INVENTORY_TTL_S", "60"))
+
+
+class DeviceInventory:
+    """
+    Cached, sorted list of the devices exported in the Tango database.
+
+    The list is refreshed when older than `ttl_s` or on demand; concurrent
+    refreshes share one database call. The version changes whenever the
+    content does and is used to build ETags; the list and its version are
+    published together as one tuple, so readers never pair one with the
+    other's predecessor.
+    """
+    def __init__(self, database_factory, ttl_s: float = TANGO_INVENTORY_TTL_S):
+        self._database_factory = database_factory
+        self.ttl_s = ttl_s
+        self._snapshot = ([], None)  # (devices, version)
+        self.refreshed_at = 0.0
+        self._refresh_flight = SingleFlight()
+
+    def _refresh(self):
+        devices = sorted(self._database_factory().get_device_exported("*").value_string)
+        self._snapshot = (devices, hashlib.sha1("\n".join(devices).encode()).hexdigest())
+        self.refreshed_at = time.time()
+
+    def snapshot(self, refresh: bool = False):
+        """
+        Return (devices, version), refreshing first if needed.
+        """
+        if refresh or self._snapshot[1] is None or time.time() - self.refreshed_at > self.ttl_s:
+            self._refresh_flight.do("refresh", self._refresh)
+        return self._snapshot
+
+    def match(self, pattern: str = None, regex: str = None, refresh: bool = False):
+        """
+        Devices matching a case-insensitive glob `pattern` and/or `regex`
+        (searched, case-insensitive). Returns (devices, version). Raises
+        re.error on an invalid regex.
+        """
+        devices, version = self.snapshot(refresh)
+        if pattern and pattern != "*":
+            pattern = pattern.lower()
+            devices = [name for name in devices if fnmatch.fnmatchcase(name.lower(), pattern)]
+        if regex:
+            compiled = re.compile(regex, re.IGNORECASE)
+            devices = [name for name in devices if compiled.search(name)]
+        return devices, version
+
+
+###############################################################################
+# Device schema index
+###############################################################################
+# Seconds between checks that a cached device schema still belongs to the
+# running device server instance
+SCHEMA_RECHECK_S = float(os.getenv("SCHEMA_RECHECK_S", "30"))
+
+
+def _attribute_schema(info):
+    """
+    JSON form of a tango.AttributeInfoEx (or AttributeInfo).
+    """
+    return {
+        "data_type": str(info.data_type),
+        "data_format": str(info.data_format),
+        "writable": str(info.writable),
+        "max_dim_x": info.max_dim_x,
+        "max_dim_y": info.max_dim_y,
+        "unit": info.unit,
+        "format": info.format,
+        "label": info.label,
+        "description": info.description,
+        "min_value": info.min_value,
+        "max_value": info.max_value,
+        "enum_labels": list(getattr(info, "enum_labels", None) or [])
+    }
+
+
+def _command_schema(info):
+    """
+    JSON form of a tango.CommandInfo.
+    """
+    return {
+        "in_type": str(info.in_type),
+        "out_type": str(info.out_type),
+        "in_type_desc": info.in_type_desc,
+        "out_type_desc": info.out_type_desc,
+        "disp_level": str(info.disp_level)
+    }
+
+
+class DeviceSchemaIndex:
+    """
+    Per-device attribute/command metadata, built lazily from
+    attribute_list_query_ex / command_list_query and cached.
+
+    A cached schema is tied to the device server instance it was read from
+    (pid and start date in the Tango database). That fingerprint is checked
+    again at most every SCHEMA_RECHECK_S seconds, and the schema rebuilt
+    when the server has restarted. `invalidate` drops it straight away.
+    """
+    def __init__(self, manager, recheck_s: float = SCHEMA_RECHECK_S):
+        self.manager = manager
+        self.recheck_s = recheck_s
+        self._schemas = {}
+        self._lock = threading.Lock()
+        self._build_flights = SingleFlight()
+
+    @staticmethod
+    def _fingerprint(proxy):
+        try:
+            info = proxy.get_device_db().get_device_info(proxy.dev_name())
+            return f"{info.pid}@{info.started_date}"
+        except Exception:
+            return None
+
+    def _build(self, device_name: str):
+        proxy = self.manager._get_or_create_device_entry(device_name)["proxy"]
+        try:
+            attribute_infos = proxy.attribute_list_query_ex()
+        except AttributeError:
+            attribute_infos = proxy.attribute_list_query()
+        schema = {
+            "device": device_name,
+            "attributes": {info.name: _attribute_schema(info) for info in attribute_infos},
+            "commands": {info.cmd_name: _command_schema(info) for info in proxy.command_list_query()},
+            "fingerprint": self._fingerprint(proxy),
+            "built_at": time.time()
+        }
+        with self._lock:
+            self._schemas[device_name] = {"schema": schema, "checked_at": time.time()}
+        return schema
+
+    def get(self, device_name: str, refresh: bool = False):
+        """
+        Return the schema of a device, building it if it is not cached, is
+        stale, or `refresh` is set.
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._schemas.get(device_name)
+        if cached is not None and not refresh:
+            if now - cached["checked_at"] < self.recheck_s:
+                return cached["schema"]
+            proxy = self.manager._get_or_create_device_entry(device_name)["proxy"]
+            if self._fingerprint(proxy) == cached["schema"]["fingerprint"]:
+                with self._lock:
+                    cached["checked_at"] = now
+                return cached["schema"]
+        return self._build_flights.do(device_name, lambda: self._build(device_name))
+
+    def update_attribute(self, device_name: str, info):
+        """
+        Replace one attribute of a cached schema with fresh configuration
+        (from an attribute configuration event). Uncached devices are left
+        to be built on demand.
+        """
+        with self._lock:
+            cached = self._schemas.get(device_name)
+            if cached is None:
+                return
+            schema = dict(cached["schema"])
+            schema["attributes"] = dict(schema["attributes"])
+            schema["attributes"][info.name] = _attribute_schema(info)
+            cached["schema"] = schema
+
+    def invalidate(self, device_name: str = None):
+        with self._lock:
+            if device_name is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(device_name, None)
+
+
+###############################################################################
+# Subscription filters
+###############################################################################
+def _same_value(value, other):
+    if isinstance(value, numpy.ndarray) or isinstance(other, numpy.ndarray):
+        return numpy.array_equal(value, other)
+    try:
+        return bool(value == other)
+    except Exception:
+        return False
+
+
+def _numeric_change(value, previous):
+    """
+    (largest absolute difference, largest absolute previous value) of two
+    numeric scalars/arrays of the same shape, or None when they can't be
+    compared numerically.
+    """
+    try:
+        current = numpy.asarray(value, dtype=float)
+        before = numpy.asarray(previous, dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if current.shape != before.shape:
+        return None
+    if not current.size:
+        return 0.0, 0.0
+    return float(numpy.max(numpy.abs(current - before))), float(numpy.max(numpy.abs(before)))
+
+
+class FlushScheduler:
+    """
+    A single thread running the delayed flushes of every SubscriptionFilter,
+    rather than one timer thread per rate-limited delivery.
+    """
+
+    def __init__(self):
+        self._due = []  # heap of (monotonic due time, sequence, callback)
+        self._seq = 0
+        self._thread = None
+        self._cond = threading.Condition(threading.Lock())
+
+    def schedule(self, delay_s: float, callback):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._due, (time.monotonic() + delay_s, self._seq, callback))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="subscription-filter-flush", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                wait_s = self._due[0][0] - time.monotonic() if self._due else None
+                if wait_s is None or wait_s > 0:
+                    self._cond.wait(wait_s)
+                    continue
+                _, _, callback = heapq.heappop(self._due)
+            try:
+                callback()
+            except Exception:
+                event_logger.exception("subscription filter flush failed")
+
+
+filter_flush_scheduler = FlushScheduler()
+
+
+class SubscriptionFilter:
+    """
+    Ingest options of one subscription, applied before an event reaches
+    latest_events, the event log and the other consumers:
+
+      abs_change      drop values that moved less than this from the last
+                      delivered value (numeric scalars and arrays)
+      rel_change      the same as a fraction of the last delivered value;
+                      with both set, exceeding either one delivers
+      max_rate_hz     deliver at most this many values per second; values
+                      arriving faster are coalesced and the latest one is
+                      delivered (by filter_flush_scheduler) when the
+                      interval is over
+      on_change_only  drop values equal to the last delivered value
+
+    offer() tells whether a value passes right away; values held back by
+    the rate limit are handed to `deliver(value, timestamp)` later.
+    """
+    OPTIONS = ("abs_change", "rel_change", "max_rate_hz", "on_change_only")
+
+    def __init__(self, deliver, abs_change: float = None, rel_change: float = None,
+                 max_rate_hz: float = None, on_change_only: bool = False):
+        self.deliver = deliver
+        self.abs_change = abs_change
+        self.rel_change = rel_change
+        self.min_interval_s = 1.0 / max_rate_hz if max_rate_hz else 0.0
+        self.on_change_only = on_change_only
+        self.options = {
+            name: option for name, option in zip(
+                self.OPTIONS, (abs_change, rel_change, max_rate_hz, on_change_only)
+            ) if option
+        }
+        self.counters = {"received": 0, "delivered": 0, "filtered": 0, "coalesced": 0}
+        self._has_last = False
+        self._last_value = None
+        self._last_delivery = 0.0
+        self._pending = None
+        self._flush_scheduled = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse_options(cls, options: dict):
+        """
+        Validate subscription options from a request; raises ValueError.
+        """
+        unknown = set(options) - set(cls.OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown subscription option(s): {', '.join(sorted(unknown))}")
+        parsed = {}
+        for name in ("abs_change", "rel_change", "max_rate_hz"):
+            if options.get(name) is not None:
+                try:
+                    parsed[name] = float(options[name])
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{name}' must be a number")
+                if parsed[name] < 0:
+                    raise ValueError(f"'{name}' must be >= 0")
+        if options.get("on_change_only"):
+            parsed["on_change_only"] = True
+        return parsed
+
+    def _suppressed(self, value):
+        """
+        Whether `value` is filtered out against the last delivered value.
+        Caller holds self._lock.
+        """
+        if not self._has_last:
+            return False
+        if self.on_change_only and _same_value(value, self._last_value):
+            return True
+        if self.abs_change is None and self.rel_change is None:
+            return False
+        change = _numeric_change(value, self._last_value)
+        if change is None:
+            return False
+        delta, scale = change
+        if self.abs_change is not None and delta >= self.abs_change:
+            return False
+        if self.rel_change is not None and delta > 0 and delta >= self.rel_change * scale:
+            return False
+        return True
+
+    def offer(self, value, timestamp: float):
+        with self._lock:
+            if self._closed:
+                return False
+            self.counters["received"] += 1
+            if self._suppressed(value):
+                self.counters["filtered"] += 1
+                return False
+            if self.min_interval_s:
+                now = time.monotonic()
+                wait_s = self._last_delivery + self.min_interval_s - now
+                # While a value is pending, newer ones replace it so that
+                # values are never delivered out of order
+                if self._pending is not None or wait_s > 0:
+                    if self._pending is not None:
+                        self.counters["coalesced"] += 1
+                    self._pending = (value, timestamp)
+                    if not self._flush_scheduled:
+                        self._flush_scheduled = True
+                        filter_flush_scheduler.schedule(max(wait_s, 0.0), self._flush)
+                    return False
+                self._last_delivery = now
+            self._delivered(value)
+            return True
+
+    def _delivered(self, value):
+        self._has_last = True
+        self._last_value = value
+        self.counters["delivered"] += 1
+
+    def _flush(self):
+        with self._lock:
+            self._flush_scheduled = False
+            pending, self._pending = self._pending, None
+            if pending is None or self._closed:
+                return
+            if self._suppressed(pending[0]):
+                self.counters["filtered"] += 1
+                return
+            self._last_delivery = time.monotonic()
+            self._delivered(pending[0])
+        self.deliver(*pending)
+
+    def close(self):
+        """
+        Stop delivering; a coalesced value still pending is dropped.
+        """
+        with self._lock:
+            self._closed = True
+            self._pending = None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, options=dict(self.options), pending=self._pending is not None)
+
+
+###############################################################################
+# Event ingest queue
+###############################################################################
+# Events waiting for the ingest thread; beyond this the oldest are dropped
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "10000"))
+# Most events applied under one acquisition of the manager lock
+EVENT_BATCH_MAX = int(os.getenv("EVENT_BATCH_MAX", "500"))
+
+# `evt` is the raw Tango event; None for values that already went through
+# the subscription's filter (value/timestamp are set instead). `generation`
+# is the attribute's value generation when the item was queued.
+_IngestItem = namedtuple(
+    "_IngestItem", "dev_entry device attribute event_type evt value timestamp queued_at generation"
+)
+
+
+class EventIngestQueue:
+    """
+    Bounded hand-off from the Tango event threads to the ingest thread.
+    put() never blocks: on overflow the oldest item is dropped, since a
+    newer value of an attribute is worth more than an older one, and the
+    drop is counted against its attribute.
+    """
+
+    def __init__(self, max_size: int = EVENT_QUEUE_SIZE):
+        self.max_size = max_size
+        self.counters = {"enqueued": 0, "applied": 0, "dropped": 0, "batches": 0}
+        self.high_watermark = 0
+        self.drops = {}  # (device, attribute) -> dropped items
+        self._items = deque()
+        self._cond = threading.Condition(threading.Lock())
+
+    def put(self, item: _IngestItem):
+        with self._cond:
+            if len(self._items) >= self.max_size:
+                dropped = self._items.popleft()
+                self.counters["dropped"] += 1
+                key = (dropped.device, dropped.attribute)
+                self.drops[key] = self.drops.get(key, 0) + 1
+            self._items.append(item)
+            self.counters["enqueued"] += 1
+            depth = len(self._items)
+            if depth > self.high_watermark:
+                self.high_watermark = depth
+            if depth == 1:
+                self._cond.notify()
+
+    def get_batch(self, max_items: int, timeout_s: float):
+        """
+        Up to `max_items` items, oldest first; waits up to `timeout_s` for
+        the first one and returns [] if none came.
+        """
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout_s)
+            batch = [self._items.popleft() for _ in range(min(len(self._items), max_items))]
+            if batch:
+                self.counters["batches"] += 1
+            return batch
+
+    def task_done(self, count: int):
+        with self._cond:
+            self.counters["applied"] += count
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def stats(self, top: int = 10):
+        with self._cond:
+            depth = len(self._items)
+            oldest_age_s = time.monotonic() - self._items[0].queued_at if depth else 0.0
+            most_dropped = sorted(self.drops.items(), key=lambda item: item[1], reverse=True)[:top]
+            return dict(
+                self.counters,
+                depth=depth,
+                max_size=self.max_size,
+                high_watermark=self.high_watermark,
+                oldest_age_s=round(oldest_age_s, 6),
+                most_dropped=[
+                    {"device": device_name, "attribute": attribute_name, "dropped": count}
+                    for (device_name, attribute_name), count in most_dropped
+                ]
+            )
+
+
+###############################################################################
+# Subscription holders
+###############################################################################
+# Event types a subscription can ask for -> tango.EventType member
+EVENT_TYPES = {
+    "change": "CHANGE_EVENT",
+    "periodic": "PERIODIC_EVENT",
+    "archive": "ARCHIVE_EVENT",
+    "user": "USER_EVENT",
+    "attr_conf": "ATTR_CONF_EVENT",
+    "data_ready": "DATA_READY_EVENT",
+}
+CHANGE_EVENT_TYPE = "change"
+ATTR_CONF_EVENT_TYPE = "attr_conf"
+DATA_READY_EVENT_TYPE = "data_ready"
+# Event types whose events carry the attribute value. data_ready events only
+# announce one; the value is then read and goes through the same path.
+VALUE_EVENT_TYPES = ("change", "periodic", "archive", "user", "data_ready")
+# Holder of subscriptions made by clients that don't send a client id
+DEFAULT_SUBSCRIPTION_HOLDER = "default"
+# Holder of the subscriptions the long running command tracker needs
+LRC_SUBSCRIPTION_HOLDER = "lrc"
+
+
+def _has_value_subscription(dev_entry, attribute_name: str, unfiltered: bool = False):
+    """
+    Whether a device entry is subscribed to value events of an attribute.
+    With unfiltered=True only subscriptions without a SubscriptionFilter
+    count, i.e. those that keep its latest_events value current enough to
+    stand in for a read. Caller holds the manager lock.
+    """
+    subscriptions = dev_entry["subscriptions"]
+    filters = dev_entry["filters"]
+    return any(
+        (attribute_name, event_type) in subscriptions
+        and not (unfiltered and (attribute_name, event_type) in filters)
+        for event_type in VALUE_EVENT_TYPES
+    )
+
+
+###############################################################################
+# Poll scheduler
+###############################################################################
+# Threads reading polled attributes (one read_attributes call per device)
+POLL_WORKERS = int(os.getenv("POLL_WORKERS", "8"))
+# Shortest poll period a client may ask for
+POLL_MIN_PERIOD_MS = float(os.getenv("POLL_MIN_PERIOD_MS", "100"))
+# Each poll is moved by up to +/- this fraction of its period, so that
+# attributes added together don't keep hitting the devices at once
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))
+# Attributes of a device that would be due within this fraction of their
+# period are read together with the ones already due
+POLL_GROUP_FRACTION = 0.5
+
+
+class PollScheduler:
+    """
+    Server-side polling of attributes that don't send events. Each polled
+    (device, attribute) has holders (client ids) with a requested period;
+    it is read at the shortest one until the last holder leaves.
+
+    A single scheduler thread picks the due attributes, grouped per device,
+    and hands each device's group to a bounded pool as one read_attributes
+    call. A device whose previous read hasn't finished is skipped for that
+    round (counted as an overrun). The values go through a
+    SubscriptionFilter (on_change_only unless told otherwise) into the same
+    ingest path as events: latest value, event log, history and waiters.
+    """
+
+    def __init__(self, manager, max_workers: int = POLL_WORKERS, jitter: float = POLL_JITTER):
+        self.manager = manager
+        self.jitter = jitter
+        self.overruns = 0
+        self._polls = {}  # (device, attribute) -> poll entry
+        self._in_flight = set()
+        self._thread = None
+        self._cond = threading.Condition(threading.Lock())
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tango-poll")
+
+    def _next_due(self, entry, now: float):
+        period_s = entry["period_s"]
+        offset = random.uniform(-self.jitter, self.jitter) * period_s if self.jitter else 0.0
+        return now + period_s + offset
+
+    def poll(self, device_name: str, attribute_name: str, period_ms: float,
+             holder: str = DEFAULT_SUBSCRIPTION_HOLDER, options: dict = None):
+        """
+        Poll an attribute every `period_ms` on behalf of `holder`. Repeating
+        the call changes the holder's period; `options` (SubscriptionFilter
+        options) replace the current ones. Returns the number of holders.
+        """
+        if period_ms < POLL_MIN_PERIOD_MS:
+            raise ValueError(f"'period_ms' must be at least {POLL_MIN_PERIOD_MS:g}")
+        # Fails early for devices that can't be reached
+        self.manager._get_or_create_device_entry(device_name)
+        device_name = sys.intern(device_name)
+        attribute_name = sys.intern(attribute_name)
+        key = (device_name, attribute_name)
+
+        subscription_filter = None
+        entry_options = dict(options or {})
+        entry_options.setdefault("on_change_only", True)
+        with self._cond:
+            entry = self._polls.get(key)
+            if entry is None or options is not None:
+                subscription_filter = SubscriptionFilter(
+                    lambda value, received: self._deliver(device_name, attribute_name, value, received),
+                    **entry_options
+                )
+            if entry is None:
+                entry = self._polls[key] = {
+                    "periods": {},
+                    "period_s": period_ms / 1000.0,
+                    "next_due": time.monotonic() + random.uniform(0.0, period_ms / 1000.0),
+                    "filter": None,
+                    "reads": 0,
+                    "errors": 0,
+                    "overruns": 0,
+                    "last_error": None,
+                    "last_read": None
+                }
+            previous_filter = entry["filter"]
+            if subscription_filter is not None:
+                entry["filter"] = subscription_filter
+            else:
+                previous_filter = None
+            entry["periods"][holder] = period_ms / 1000.0
+            entry["period_s"] = min(entry["periods"].values())
+            entry["next_due"] = min(entry["next_due"], time.monotonic() + entry["period_s"])
+            holders = len(entry["periods"])
+            self._cond.notify()
+        if previous_filter is not None:
+            previous_filter.close()
+        self.manager._ensure_ingest_thread()
+        self._ensure_thread()
+        return holders
+
+    def unpoll(self, device_name: str, attribute_name: str,
+               holder: str = DEFAULT_SUBSCRIPTION_HOLDER, force: bool = False):
+        """
+        Release `holder`'s poll of an attribute; polling stops once no
+        holder is left (or straight away with force=True). Returns the
+        number of remaining holders.
+        """
+        with self._cond:
+            entry = self._polls.get((device_name, attribute_name))
+            if entry is None:
+                return 0
+            if force:
+                entry["periods"].clear()
+            else:
+                entry["periods"].pop(holder, None)
+            if entry["periods"]:
+                entry["period_s"] = min(entry["periods"].values())
+                return len(entry["periods"])
+            del self._polls[(device_name, attribute_name)]
+        entry["filter"].close()
+        return 0
+
+    def polled_devices(self):
+        with self._cond:
+            return {device_name for device_name, _ in self._polls}
+
+    def clear(self):
+        with self._cond:
+            entries = list(self._polls.values())
+            self._polls.clear()
+        for entry in entries:
+            entry["filter"].close()
+
+    def list(self):
+        """
+        device -> attribute -> poll state (period, holders, read/error/
+        overrun counters, last read, filter counters).
+        """
+        with self._cond:
+            polls = list(self._polls.items())
+            result = {}
+            for (device_name, attribute_name), entry in polls:
+                result.setdefault(device_name, {})[attribute_name] = {
+                    "period_ms": round(entry["period_s"] * 1000.0, 3),
+                    "holders": {holder: round(period_s * 1000.0, 3)
+                                for holder, period_s in entry["periods"].items()},
+                    "reads": entry["reads"],
+                    "errors": entry["errors"],
+                    "overruns": entry["overruns"],
+                    "last_error": entry["last_error"],
+                    "last_read": entry["last_read"]
+                }
+        for (device_name, attribute_name), entry in polls:
+            result[device_name][attribute_name]["filter"] = entry["filter"].stats()
+        return result
+
+    def _ensure_thread(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="tango-poll-scheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                due = self._collect_due(time.monotonic())
+                if not due:
+                    next_due = min((entry["next_due"] for entry in self._polls.values()), default=None)
+                    self._cond.wait(None if next_due is None else max(next_due - time.monotonic(), 0.0))
+                    continue
+                self._in_flight.update(due)
+            for device_name, attributes in due.items():
+                self._executor.submit(self._read, device_name, attributes)
+
+    def _collect_due(self, now: float):
+        """
+        device -> attributes to read now, rescheduling them. Caller holds
+        self._cond.
+        """
+        due_devices = set()
+        for (device_name, attribute_name), entry in self._polls.items():
+            if entry["next_due"] > now:
+                continue
+            if device_name in self._in_flight:
+                entry["overruns"] += 1
+                self.overruns += 1
+                entry["next_due"] = self._next_due(entry, now)
+                continue
+            due_devices.add(device_name)
+
+        due = {}
+        for (device_name, attribute_name), entry in self._polls.items():
+            if device_name not in due_devices:
+                continue
+            if entry["next_due"] - now <= entry["period_s"] * POLL_GROUP_FRACTION:
+                due.setdefault(device_name, []).append(attribute_name)
+                entry["next_due"] = self._next_due(entry, now)
+        return due
+
+    def _read(self, device_name: str, attributes: list):
+        try:
+            with self._cond:
+                filters = {
+                    attribute_name: self._polls[(device_name, attribute_name)]["filter"]
+                    for attribute_name in attributes if (device_name, attribute_name) in self._polls
+                }
+            if not filters:
+                return
+            try:
+                dev_entry = self.manager._get_or_create_device_entry(device_name)
+                errors = self.manager._ingest_read(dev_entry, device_name, list(filters), filters)
+            except Exception as e:
+                errors = dict.fromkeys(filters, str(e))
+                log_event(self.manager.event_log_sampler, logging.WARNING, (device_name, "<poll>"),
+                          "poll of %s %s failed: %s", device_name, list(filters), e)
+            now = time.time()
+            with self._cond:
+                for attribute_name in filters:
+                    entry = self._polls.get((device_name, attribute_name))
+                    if entry is None:
+                        continue
+                    entry["reads"] += 1
+                    entry["last_read"] = now
+                    if attribute_name in errors:
+                        entry["errors"] += 1
+                        entry["last_error"] = errors[attribute_name]
+        finally:
+            with self._cond:
+                self._in_flight.discard(device_name)
+
+    def _deliver(self, device_name: str, attribute_name: str, value, received: float):
+        dev_entry = self.manager.devices.get(device_name)
+        if dev_entry is not None:
+            self.manager._enqueue_value(dev_entry, device_name, attribute_name, value, received)
+
+
+###############################################################################
+# Device proxy pool
+###############################################################################
+# Most device proxies kept alive; least recently used ones without active
+# subscriptions are dropped beyond this
+PROXY_POOL_MAX = int(os.getenv("PROXY_POOL_MAX", "500"))
+# Seconds between background pings of every pooled proxy (0 disables)
+PROXY_HEALTH_INTERVAL_S = float(os.getenv("PROXY_HEALTH_INTERVAL_S", "30"))
+# Threads pinging proxies for the health check, apart from the fan-out pool
+# so a sweep never holds up client requests
+PROXY_HEALTH_WORKERS = int(os.getenv("PROXY_HEALTH_WORKERS", "8"))
+
+
 ###############################################################################
 # TangoManager Class
 ###############################################################################
@@ -211,7 +1816,7 @@ class TangoManager:
               "sys/tg_test/1": {
                  "proxy": <tango.DeviceProxy>,
                  "subscriptions": {
-                    "ampli": <event_id>,
+                    ("ampli", "change"): <event_id>,
                     ...
                  },
                  "latest_events": {
@@ -220,59 +1825,361 @@ class TangoManager:
                  },
                  "event_count": {
                     "ampli": int_count_of_events
-                 }
+                 },
+                 "latest_times": {
+                    "ampli": epoch_of_last_event
+                 },
+                 "filters": {
+                    ("ampli", "change"): <SubscriptionFilter>
+                                        (only for subscriptions with
+                                         ingest options)
+                 },
+                 "holders": {
+                    ("ampli", "change"): {"ci-job-17": 1, "default": 3, ...}
+                                        (holder -> count; only the
+                                         anonymous "default" holder counts
+                                         above 1)
+                 },
+                 "generations": {
+                    "ampli": int   (bumped when the first value subscription
+                                    of the attribute is made and when the
+                                    last one is removed; queued values of
+                                    an older generation are dropped)
+                 },
+                 "healthy": True   (result of the last background ping)
               },
               ...
             }
+           kept in least-recently-used order and capped at PROXY_POOL_MAX.
+
+        2) A queue (deque) of the last 100 event logs: each item is an
+           EventRecord(seq, timestamp, device, attribute, value) where seq
+           is global and monotonically increasing and timestamp is epoch
+           seconds. EventRecord.to_dict() gives the JSON form.
+        """
+        self.devices = OrderedDict()
+        self.max_devices = PROXY_POOL_MAX
+        self.pool_stats = {
+            "hits": 0, "misses": 0, "evictions": 0,
+            "health_failures": 0, "reconnects": 0
+        }
+        self._health_thread = None
+        self._ingest_thread = None
+        # One DeviceProxy construction per device at a time, outside self.lock
+        self._proxy_flights = SingleFlight()
+        # Identical concurrent attribute reads / idempotent commands share one call
+        self._read_flights = SingleFlight()
+        self._command_flights = SingleFlight()
+        self.event_logs = deque(maxlen=100)
+        self.event_seq = 0
+        self.history = EventHistoryStore()
+        self.lock = threading.Lock()
+        self.waiters = EventWaiterRegistry()
+        self.broadcaster = EventBroadcaster()
+        self.event_log_sampler = EventLogSampler()
+        # Tango callbacks only enqueue; the ingest thread applies the events
+        self.ingest_queue = EventIngestQueue()
+        self.executor = ThreadPoolExecutor(
+            max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="tango-fanout"
+        )
+        self.health_executor = ThreadPoolExecutor(
+            max_workers=PROXY_HEALTH_WORKERS, thread_name_prefix="tango-health"
+        )
+        self.jobs = CommandJobTable()
+        self.lrc = LongRunningCommandTracker(self)
+        self.read_cache = AttributeReadCache()
+        # pattern -> {"members": [...], "resolved_at": epoch}, LRU order
+        self.groups = OrderedDict()
+        self._database = None
+        self.inventory = DeviceInventory(self.get_database)
+        self.schemas = DeviceSchemaIndex(self)
+        self.poller = PollScheduler(self)
+        # (device, attribute, event type) -> lock serializing its
+        # subscribe/unsubscribe
+        self._subscription_locks = {}
+        # device -> attributes with a data ready event whose read hasn't
+        # started yet
+        self._data_ready_pending = {}
+
+    def reset(self):
+        """
+        Reset the entire manager, removing all device proxies, subscriptions,
+        and event logs. It's as if we have a fresh client.
+        """
+        with self.lock:
+            entries = list(self.devices.items())
+            self.devices.clear()
+            self.event_logs.clear()
+            self.ingest_queue.clear()
+            self.history.clear()
+            self.read_cache.invalidate()
+            self.schemas.invalidate()
+            self.event_log_sampler.clear()
+            self.groups.clear()
+        self.poller.clear()
+        # Unsubscribe outside the lock: these are network calls, and event
+        # delivery and other requests shouldn't wait for them
+        for device_name, dev_entry in entries:
+            for subscription_filter in dev_entry["filters"].values():
+                subscription_filter.close()
+            for (attribute, event_type), event_id in dev_entry["subscriptions"].items():
+                try:
+                    dev_entry["proxy"].unsubscribe_event(event_id)
+                except Exception as e:
+                    event_logger.warning("reset: could not unsubscribe %s/%s (%s): %s",
+                                         device_name, attribute, event_type, e)
+
+    def _get_or_create_device_entry(self, device_name):
+        """
+        Get an existing device entry if it exists,
+        otherwise create a new one and store it.
+
+        The DeviceProxy is built outside self.lock (it can block for seconds
+        on an unreachable device), and concurrent requests for the same
+        device share a single construction.
+        """
+        with self.lock:
+            dev_entry = self.devices.get(device_name)
+            if dev_entry is not None:
+                self.devices.move_to_end(device_name)
+                self.pool_stats["hits"] += 1
+        if dev_entry is None:
+            dev_entry = self._proxy_flights.do(
+                device_name, lambda: self._create_device_entry(device_name)
+            )
+        self._ensure_health_thread()
+        return dev_entry
+
+    def _create_device_entry(self, device_name):
+        with self.lock:
+            # A construction that finished just before ours started
+            dev_entry = self.devices.get(device_name)
+            if dev_entry is not None:
+                return dev_entry
+            self.pool_stats["misses"] += 1
+
+        proxy = tango.DeviceProxy(device_name)
+
+        with self.lock:
+            dev_entry = self.devices.setdefault(device_name, {
+                "proxy": proxy,
+                "subscriptions": {},
+                "latest_events": {},
+                "event_count": {},  # track how many events have arrived per attribute
+                "latest_times": {},
+                "filters": {},
+                "holders": {},
+                "generations": {},
+                "healthy": True
+            })
+            self._evict_devices()
+        return dev_entry
+
+    def _evict_devices(self):
+        """
+        Drop least recently used entries until the pool fits max_devices.
+        Entries with active subscriptions or polled attributes are never
+        evicted. Caller holds self.lock.
+        """
+        excess = len(self.devices) - self.max_devices
+        if excess <= 0:
+            return
+        polled = self.poller.polled_devices()
+        for device_name in list(self.devices):
+            if excess <= 0:
+                break
+            if self.devices[device_name]["subscriptions"] or device_name in polled:
+                continue
+            del self.devices[device_name]
+            self.pool_stats["evictions"] += 1
+            excess -= 1
+
+    def _ensure_health_thread(self):
+        if not PROXY_HEALTH_INTERVAL_S or self._health_thread is not None:
+            return
+        with self.lock:
+            if self._health_thread is not None:
+                return
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name="tango-proxy-health", daemon=True
+            )
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            time.sleep(PROXY_HEALTH_INTERVAL_S)
+            try:
+                self.check_proxies()
+            except Exception as e:
+                event_logger.exception("health: proxy check failed: %s", e)
+
+    def _ensure_ingest_thread(self):
+        if self._ingest_thread is not None:
+            return
+        with self.lock:
+            if self._ingest_thread is not None:
+                return
+            self._ingest_thread = threading.Thread(
+                target=self._ingest_loop, name="tango-event-ingest", daemon=True
+            )
+        self._ingest_thread.start()
 
-        2) A queue (deque) of the last 100 event logs: each item is a dict:
-            {
-              "timestamp": ...,
-              "device": ...,
-              "attribute": ...,
-              "value": ...
-            }
+    def _ingest_loop(self):
+        while True:
+            batch = self.ingest_queue.get_batch(EVENT_BATCH_MAX, 1.0)
+            if not batch:
+                continue
+            try:
+                self._apply_events(batch)
+            except Exception:
+                event_logger.exception("failed to apply %d events", len(batch))
+            self.ingest_queue.task_done(len(batch))
+
+    def check_proxies(self, deadline_s: float = FANOUT_DEADLINE_S):
         """
-        self.devices = {}
-        self.event_logs = deque(maxlen=100)
-        self.lock = threading.Lock()
+        Ping every pooled proxy. Proxies that don't answer are marked
+        unhealthy and rebuilt: a fresh DeviceProxy replaces the old one and
+        the entry's subscriptions are re-created on it, so clients never
+        have to call /reset_manager after a device server restart.
 
-    def reset(self):
+        Pings run on their own pool; the ones still queued at the deadline
+        were never sent, so those proxies are left for the next sweep.
         """
-        Reset the entire manager, removing all device proxies, subscriptions,
-        and event logs. It's as if we have a fresh client.
+        with self.lock:
+            entries = list(self.devices.items())
+        pings = self.fan_out(
+            lambda item: item[1]["proxy"].ping(), entries, deadline_s,
+            executor=self.health_executor, skip_unstarted=True
+        )
+        dead = []
+        for (device_name, dev_entry), result, error, elapsed in pings:
+            dev_entry["healthy"] = error is None
+            if error is not None:
+                with self.lock:
+                    self.pool_stats["health_failures"] += 1
+                dead.append((device_name, dev_entry))
+        for device_name, dev_entry in dead:
+            try:
+                self._rebuild_device_entry(device_name, dev_entry)
+            except Exception as e:
+                event_logger.warning("health: could not reconnect %s: %s", device_name, e)
+
+    def _rebuild_device_entry(self, device_name, dev_entry):
+        """
+        Swap a fresh, responsive DeviceProxy into `dev_entry` and
+        re-subscribe the attributes it was subscribed to.
         """
+        proxy = tango.DeviceProxy(device_name)
+        proxy.ping()
         with self.lock:
-            for device_name, dev_entry in self.devices.items():
-                # Unsubscribe from all existing subscriptions
-                for attribute, event_id in dev_entry["subscriptions"].items():
-                    dev_entry["proxy"].unsubscribe_event(event_id)
-            self.devices.clear()
-            self.event_logs.clear()
+            old_proxy = dev_entry["proxy"]
+            old_subscriptions = dict(dev_entry["subscriptions"])
+            dev_entry["proxy"] = proxy
+            dev_entry["subscriptions"].clear()
+            dev_entry["healthy"] = True
+            self.pool_stats["reconnects"] += 1
+        # The device server may have come back with a different interface
+        self.schemas.invalidate(device_name)
+        for key, event_id in old_subscriptions.items():
+            try:
+                old_proxy.unsubscribe_event(event_id)
+            except Exception:
+                pass
+            with self._subscription_lock(device_name, key):
+                # Holders and filters stay; only the Tango subscription is new
+                if dev_entry["holders"].get(key) and key not in dev_entry["subscriptions"]:
+                    self._subscribe_events(dev_entry, device_name, *key)
 
-    def _get_or_create_device_entry(self, device_name):
+    def get_pool_stats(self):
         """
-        Get an existing device entry if it exists,
-        otherwise create a new one and store it.
+        Pool size, hit/miss/eviction/reconnect counters and per-device state.
         """
         with self.lock:
-            if device_name not in self.devices:
-                proxy = tango.DeviceProxy(device_name)
-                self.devices[device_name] = {
-                    "proxy": proxy,
-                    "subscriptions": {},
-                    "latest_events": {},
-                    "event_count": {}  # track how many events have arrived per attribute
+            return dict(
+                self.pool_stats,
+                shared_constructions=self._proxy_flights.shared,
+                coalesced_reads=self._read_flights.shared,
+                coalesced_commands=self._command_flights.shared,
+                size=len(self.devices),
+                max_size=self.max_devices,
+                devices={
+                    device_name: {
+                        "healthy": dev_entry["healthy"],
+                        "subscriptions": len(dev_entry["subscriptions"])
+                    }
+                    for device_name, dev_entry in self.devices.items()
                 }
-            return self.devices[device_name]
+            )
+
+    def _subscription_lock(self, device_name: str, key: tuple):
+        with self.lock:
+            return self._subscription_locks.setdefault((device_name,) + key, threading.Lock())
 
-    def subscribe_attribute(self, device_name: str, attribute_name: str):
+    def subscribe_attribute(self, device_name: str, attribute_name: str, options: dict = None,
+                            holder: str = DEFAULT_SUBSCRIPTION_HOLDER,
+                            event_type: str = CHANGE_EVENT_TYPE):
         """
-        Subscribe to the attribute on the given device.
-        The subscription remains active for the lifetime of this manager
-        or until unsubscribed.
+        Subscribe to the attribute on the given device on behalf of
+        `holder` (a client id). There is a single Tango subscription per
+        attribute and event type however many holders share it; it is
+        only made for the first holder and lives until the last one has
+        unsubscribed. Returns the number of holders.
+
+        Named holders hold a subscription once however often they
+        subscribe. Clients without an id can't be told apart, so every
+        subscription made with DEFAULT_SUBSCRIPTION_HOLDER counts and needs
+        its own unsubscribe.
+
+        `event_type` is one of EVENT_TYPES. Value events (change, periodic,
+        archive, user) are stored like change events; attr_conf events
+        refresh the cached attribute metadata; data_ready events trigger a
+        read of the attribute whose value is then stored.
+
+        `options` are SubscriptionFilter options (deadband, rate limit,
+        on-change-only) applied to the values before they are stored. They
+        belong to the shared subscription, so the latest ones given win;
+        options=None keeps the current ones.
+        """
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type '{event_type}', expected one of {', '.join(EVENT_TYPES)}")
+        if options and event_type not in VALUE_EVENT_TYPES:
+            raise ValueError(f"'{event_type}' events carry no value to filter")
+        # Shared by every history sample / log record of this attribute
+        device_name = sys.intern(device_name)
+        attribute_name = sys.intern(attribute_name)
+        key = (attribute_name, event_type)
+
+        with self._subscription_lock(device_name, key):
+            dev_entry = self._get_or_create_device_entry(device_name)
+            if key not in dev_entry["subscriptions"]:
+                self._subscribe_events(dev_entry, device_name, attribute_name, event_type)
+            if options is not None:
+                self._set_subscription_filter(dev_entry, device_name, key, options)
+            with self.lock:
+                holders = dev_entry["holders"].setdefault(key, {})
+                if holder == DEFAULT_SUBSCRIPTION_HOLDER:
+                    holders[holder] = holders.get(holder, 0) + 1
+                else:
+                    holders[holder] = 1
+                return sum(holders.values())
+
+    def _set_subscription_filter(self, dev_entry, device_name: str, key: tuple, options: dict):
+        def _deliver(value, received):
+            self._enqueue_value(dev_entry, device_name, key[0], value, received)
+
+        subscription_filter = SubscriptionFilter(_deliver, **options) if options else None
+        with self.lock:
+            previous_filter = dev_entry["filters"].pop(key, None)
+            if subscription_filter is not None:
+                dev_entry["filters"][key] = subscription_filter
+        if previous_filter is not None:
+            previous_filter.close()
+
+    def _subscribe_events(self, dev_entry, device_name: str, attribute_name: str, event_type: str):
+        """
+        Make the Tango event subscription of an attribute and record its
+        event ID.
         """
-        dev_entry = self._get_or_create_device_entry(device_name)
         proxy = dev_entry["proxy"]
 
         # Full attribute name might look like "sys/tg_test/1/ampli"
@@ -280,64 +2187,308 @@ class TangoManager:
 
         def _event_callback(evt):
             """
-            Callback for receiving events. We'll store the last known value
-            in dev_entry["latest_events"] and also log it in our queue.
+            Runs on the Tango event thread, so it only hands the event over
+            to the ingest thread (see _apply_events).
             """
-            timestamp = datetime.datetime.now().isoformat()
-            if evt.err:
-                print(f"[ERROR] {full_attr_name} => {evt.errors}")
-                # Optionally store error logs if needed
-            else:
-                value = evt.attr_value.value
-                print(f"[EVENT] {full_attr_name} => {value}")
-
-                with self.lock:
-                    dev_entry["latest_events"][attribute_name] = value
-                    dev_entry["event_count"][attribute_name] = (
-                        dev_entry["event_count"].get(attribute_name, 0) + 1
-                    )
-                    self.event_logs.append({
-                        "timestamp": timestamp,
-                        "device": device_name,
-                        "attribute": attribute_name,
-                        "value": value
-                    })
+            self.ingest_queue.put(_IngestItem(
+                dev_entry, device_name, attribute_name, event_type, evt, None, None, time.monotonic(),
+                dev_entry["generations"].get(attribute_name, 0)
+            ))
 
+        if event_type in VALUE_EVENT_TYPES:
+            with self.lock:
+                if not _has_value_subscription(dev_entry, attribute_name):
+                    # Only values of this new subscription count as current
+                    self._next_value_generation(dev_entry, attribute_name)
+        self._ensure_ingest_thread()
         event_id = proxy.subscribe_event(
             attribute_name,
-            tango.EventType.CHANGE_EVENT,
+            getattr(tango.EventType, EVENT_TYPES[event_type]),
             _event_callback,
             stateless=True
         )
 
-        dev_entry["subscriptions"][attribute_name] = event_id
-        dev_entry["event_count"].setdefault(attribute_name, 0)
-        print(f"Subscribed to {full_attr_name} with event ID: {event_id}")
+        with self.lock:
+            dev_entry["subscriptions"][(attribute_name, event_type)] = event_id
+            dev_entry["event_count"].setdefault(attribute_name, 0)
+        print(f"Subscribed to {full_attr_name} ({event_type}) with event ID: {event_id}")
 
-    def unsubscribe_attribute(self, device_name: str, attribute_name: str):
+    def _enqueue_value(self, dev_entry, device_name: str, attribute_name: str, value, received: float):
         """
-        Unsubscribe from an attribute, if currently subscribed.
+        Queue an attribute value that needs no further filtering.
         """
-        dev_entry = self._get_or_create_device_entry(device_name)
-        subs = dev_entry["subscriptions"]
-        if attribute_name in subs:
-            event_id = subs[attribute_name]
-            dev_entry["proxy"].unsubscribe_event(event_id)
-            del subs[attribute_name]
-            print(f"Unsubscribed from {device_name}/{attribute_name}, event ID: {event_id}")
+        self.ingest_queue.put(_IngestItem(
+            dev_entry, device_name, attribute_name, None, None, value, received, time.monotonic(),
+            dev_entry["generations"].get(attribute_name, 0)
+        ))
+
+    def _next_value_generation(self, dev_entry, attribute_name: str):
+        """
+        Start a new value generation of the attribute (self.lock held):
+        forget its latest value and drop the values still queued for the
+        previous one, so a stale value is never taken for a current one.
+        """
+        dev_entry["generations"][attribute_name] = dev_entry["generations"].get(attribute_name, 0) + 1
+        dev_entry["latest_events"].pop(attribute_name, None)
+        dev_entry["latest_times"].pop(attribute_name, None)
+
+    def _apply_events(self, batch: list):
+        """
+        Apply a batch of queued events (ingest thread only): log them,
+        run them through their subscription's filter, then store the values
+        that pass - latest value and counters, the event log - under a
+        single acquisition of self.lock, and finally feed history, long
+        running command results, event waiters and stream clients.
+
+        Attribute configuration events update the schema cache instead, and
+        the data ready events of a batch become one read per device.
+        """
+        accepted = []
+        data_ready = {}
+        for item in batch:
+            evt = item.evt
+            if evt is None:
+                accepted.append((item.dev_entry, item.device, item.attribute, item.value, item.timestamp,
+                                 item.generation))
+                continue
+            key = (item.device, item.attribute)
+            if evt.err:
+                log_event(self.event_log_sampler, logging.WARNING, key,
+                          "event error %s/%s => %s", item.device, item.attribute, evt.errors,
+                          device=item.device, attribute=item.attribute)
+                continue
+            if item.event_type == ATTR_CONF_EVENT_TYPE:
+                attr_conf = getattr(evt, "attr_conf", None)
+                if attr_conf is not None:
+                    self.schemas.update_attribute(item.device, attr_conf)
+                continue
+            if item.event_type == DATA_READY_EVENT_TYPE:
+                data_ready.setdefault(item.device, (item.dev_entry, set()))[1].add(item.attribute)
+                continue
+            value = evt.attr_value.value
+            received = event_time(evt)
+            log_event(self.event_log_sampler, logging.INFO, key,
+                      "event %s/%s => %s", item.device, item.attribute, LogValue(value),
+                      device=item.device, attribute=item.attribute, event_time=received)
+            subscription_filter = item.dev_entry["filters"].get((item.attribute, item.event_type))
+            if subscription_filter is not None and not subscription_filter.offer(value, received):
+                continue
+            accepted.append((item.dev_entry, item.device, item.attribute, value, received, item.generation))
+
+        for device_name, (dev_entry, attributes) in data_ready.items():
+            self._schedule_data_ready_read(dev_entry, device_name, attributes)
+
+        records = []
+        with self.lock:
+            for dev_entry, device_name, attribute_name, value, received, generation in accepted:
+                # Events still queued for an entry dropped by reset(), or for
+                # a subscription that has been removed since
+                if (self.devices.get(device_name) is not dev_entry
+                        or generation != dev_entry["generations"].get(attribute_name, 0)):
+                    continue
+                previous_value = dev_entry["latest_events"].get(attribute_name)
+                dev_entry["latest_events"][attribute_name] = value
+                dev_entry["latest_times"][attribute_name] = received
+                dev_entry["event_count"][attribute_name] = (
+                    dev_entry["event_count"].get(attribute_name, 0) + 1
+                )
+                self.event_seq += 1
+                entry = EventRecord(self.event_seq, received, device_name, attribute_name, value)
+                self.event_logs.append(entry)
+                records.append((entry, previous_value))
+
+        for entry, previous_value in records:
+            self.history.append(entry.device, entry.attribute, entry.timestamp, entry.value)
+            if entry.attribute == LRC_RESULT_ATTRIBUTE:
+                self.lrc.record(entry.device, entry.value, entry.timestamp)
+            self.waiters.notify((entry.device, entry.attribute), entry.value, previous_value)
+            self.broadcaster.publish(entry)
+
+    def _schedule_data_ready_read(self, dev_entry, device_name: str, attributes: set):
+        """
+        Read attributes that announced new data, with one read_attributes
+        call per device. Announcements arriving before that read starts are
+        folded into it.
+        """
+        with self.lock:
+            pending = self._data_ready_pending.get(device_name)
+            if pending is not None:
+                pending.update(attributes)
+                return
+            self._data_ready_pending[device_name] = set(attributes)
+        self.executor.submit(self._read_data_ready, dev_entry, device_name)
+
+    def _read_data_ready(self, dev_entry, device_name: str):
+        with self.lock:
+            attributes = sorted(self._data_ready_pending.pop(device_name, ()))
+        if not attributes:
+            return
+        filters = {
+            attribute_name: dev_entry["filters"].get((attribute_name, DATA_READY_EVENT_TYPE))
+            for attribute_name in attributes
+        }
+        try:
+            self._ingest_read(dev_entry, device_name, attributes, filters)
+        except Exception as e:
+            event_logger.warning("data ready read of %s %s failed: %s", device_name, attributes, e)
+
+    def _ingest_read(self, dev_entry, device_name: str, attributes: list, filters: dict):
+        """
+        Read `attributes` with one read_attributes call and queue their
+        values like event values, through filters[attribute_name] when
+        that's a SubscriptionFilter. The read cache is refreshed too.
+        Returns {attribute_name: error} for attributes that failed; raises
+        if the call itself fails.
+        """
+        results = dev_entry["proxy"].read_attributes(attributes)
+        now = time.time()
+        errors = {}
+        for attribute_name, attr_data in zip(attributes, results):
+            if getattr(attr_data, "has_failed", False):
+                try:
+                    errors[attribute_name] = str(attr_data.get_err_stack())
+                except Exception:
+                    errors[attribute_name] = "read failed"
+                continue
+            received = attr_data.time.totime() if attr_data.time is not None else now
+            self.read_cache.put((device_name, attribute_name), attr_data.value, now)
+            subscription_filter = filters.get(attribute_name)
+            if subscription_filter is not None and not subscription_filter.offer(attr_data.value, received):
+                continue
+            self._enqueue_value(dev_entry, device_name, attribute_name, attr_data.value, received)
+        return errors
+
+    def get_subscriptions(self):
+        """
+        device -> attribute -> event type -> subscription info, including
+        the ingest options and filter counters of filtered subscriptions.
+        """
+        with self.lock:
+            entries = list(self.devices.items())
+        result = {}
+        for device_name, dev_entry in entries:
+            attributes = {}
+            for key, event_id in list(dev_entry["subscriptions"].items()):
+                attribute_name, event_type = key
+                info = {
+                    "event_id": event_id,
+                    "event_count": dev_entry["event_count"].get(attribute_name, 0),
+                    "holders": dict(sorted(dev_entry["holders"].get(key, {}).items()))
+                }
+                subscription_filter = dev_entry["filters"].get(key)
+                if subscription_filter is not None:
+                    info["filter"] = subscription_filter.stats()
+                attributes.setdefault(attribute_name, {})[event_type] = info
+            if attributes:
+                result[device_name] = attributes
+        return result
+
+    def unsubscribe_attribute(self, device_name: str, attribute_name: str,
+                              holder: str = DEFAULT_SUBSCRIPTION_HOLDER, force: bool = False,
+                              event_type: str = CHANGE_EVENT_TYPE):
+        """
+        Release `holder`'s share of an attribute subscription. The Tango
+        subscription is only removed once no holder is left (or straight
+        away with force=True). Returns the number of remaining holders.
+        """
+        key = (attribute_name, event_type)
+        with self._subscription_lock(device_name, key):
+            with self.lock:
+                dev_entry = self.devices.get(device_name)
+                if dev_entry is None:
+                    return 0
+                holders = dev_entry["holders"].get(key, {})
+                if force:
+                    holders.clear()
+                elif holders.get(holder, 0) > 1:
+                    holders[holder] -= 1
+                else:
+                    holders.pop(holder, None)
+                if holders:
+                    return sum(holders.values())
+                dev_entry["holders"].pop(key, None)
+                event_id = dev_entry["subscriptions"].pop(key, None)
+                subscription_filter = dev_entry["filters"].pop(key, None)
+                if event_type in VALUE_EVENT_TYPES and not _has_value_subscription(dev_entry, attribute_name):
+                    self._next_value_generation(dev_entry, attribute_name)
+            if subscription_filter is not None:
+                subscription_filter.close()
+            if event_id is not None:
+                dev_entry["proxy"].unsubscribe_event(event_id)
+                self.event_log_sampler.forget((device_name, attribute_name))
+                print(f"Unsubscribed from {device_name}/{attribute_name} ({event_type}), event ID: {event_id}")
+            return 0
 
     def run_command(self, device_name: str, command_name: str, args=None):
         """
-        Run a Tango command on the specified device.
+        Run a Tango command on the specified device. Commands other than
+        the side-effect free COALESCED_COMMANDS drop the device's cached
+        reads once they return, since they may have changed its attributes.
         """
         dev_entry = self._get_or_create_device_entry(device_name)
         proxy = dev_entry["proxy"]
-        if not str(args):
-            print(f"Running command on {device_name}: {command_name}() [no args]")
-            return proxy.command_inout(command_name)
-        else:
-            print(f"Running command on {device_name}: {command_name}({args})")
-            return proxy.command_inout(command_name, args)
+        if args is None and command_name.lower() in COALESCED_COMMANDS:
+            return self._command_flights.do(
+                (device_name, command_name.lower()),
+                lambda: proxy.command_inout(command_name)
+            )
+        try:
+            if not str(args):
+                print(f"Running command on {device_name}: {command_name}() [no args]")
+                return proxy.command_inout(command_name)
+            else:
+                print(f"Running command on {device_name}: {command_name}({args})")
+                return proxy.command_inout(command_name, args)
+        finally:
+            self.read_cache.invalidate_device(device_name)
+
+    def get_database(self):
+        """
+        Shared tango.Database handle, created on first use.
+        """
+        if self._database is None:
+            self._database = tango.Database()
+        return self._database
+
+    def resolve_group(self, devices: list = None, pattern: str = None):
+        """
+        Return the member list of a device group, given either an explicit
+        list of device names or a wildcard pattern ("mid-dish/leaf-node/*").
+        Pattern groups are cached (at most GROUP_CACHE_MAX of them) and
+        re-resolved against the device inventory once they are older than
+        GROUP_CACHE_TTL_S; explicit lists are just de-duplicated.
+        """
+        if not pattern:
+            return list(dict.fromkeys(devices or ()))
+
+        now = time.time()
+        with self.lock:
+            group = self.groups.get(pattern)
+            if group and now - group["resolved_at"] < GROUP_CACHE_TTL_S:
+                self.groups.move_to_end(pattern)
+                return group["members"]
+
+        members = list(self.inventory.match(pattern)[0])
+
+        with self.lock:
+            self.groups[pattern] = {"members": members, "resolved_at": now}
+            self.groups.move_to_end(pattern)
+            while len(self.groups) > GROUP_CACHE_MAX:
+                self.groups.popitem(last=False)
+        return members
+
+    def run_group_command(self, members: list, command_name: str, args=None,
+                          deadline_s: float = FANOUT_DEADLINE_S):
+        """
+        Run the same command on every member concurrently. Yields
+        (device_name, result, error, elapsed_s) as each device replies, so
+        the total time is close to the slowest device rather than the sum.
+        """
+        return self.fan_out(
+            lambda device_name: self.run_command(device_name, command_name, args),
+            members,
+            deadline_s
+        )
 
     def ping_device(self, device_name: str):
         """
@@ -346,12 +2497,84 @@ class TangoManager:
         dev_entry = self._get_or_create_device_entry(device_name)
         return dev_entry["proxy"].ping()
 
+    def fan_out(self, func, items, deadline_s: float = FANOUT_DEADLINE_S,
+                executor: ThreadPoolExecutor = None, skip_unstarted: bool = False):
+        """
+        Call func(item) for every item on the shared worker pool (or
+        `executor`) and yield (item, result, error, elapsed_s) as each call
+        completes. Calls still running when `deadline_s` expires are yielded
+        with a TimeoutError (the worker itself finishes in the background).
+        Calls that never left the queue are cancelled, and with
+        skip_unstarted=True not yielded at all.
+        """
+        def _timed(item):
+            t0 = time.monotonic()
+            try:
+                return func(item), None, time.monotonic() - t0
+            except Exception as e:
+                return None, e, time.monotonic() - t0
+
+        started = time.monotonic()
+        executor = executor or self.executor
+        futures = {executor.submit(_timed, item): item for item in items}
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=deadline_s):
+                pending.discard(future)
+                yield (futures[future],) + future.result()
+        except FuturesTimeoutError:
+            for future in pending:
+                if future.done():
+                    yield (futures[future],) + future.result()
+                elif future.cancel() and skip_unstarted:
+                    continue
+                else:
+                    yield (futures[future], None,
+                           TimeoutError(f"No reply within {deadline_s} seconds."),
+                           time.monotonic() - started)
+
     def read_attribute(self, device_name: str, attribute_name: str):
         """
         Read a single attribute's current value from a device.
+        Concurrent reads of the same attribute share one read_attribute call.
         """
         dev_entry = self._get_or_create_device_entry(device_name)
-        return dev_entry["proxy"].read_attribute(attribute_name).value
+        return self._read_flights.do(
+            (device_name, attribute_name),
+            lambda: dev_entry["proxy"].read_attribute(attribute_name).value
+        )
+
+    def read_attribute_cached(self, device_name: str, attribute_name: str,
+                              max_age_s: float = None, fresh: bool = False):
+        """
+        Read-through version of read_attribute. Returns (value, source, age_s):
+
+          "subscription"  the attribute is subscribed, without ingest
+                          filter, on a healthy proxy, so the latest event
+                          value is current
+          "cache"         a polled read younger than the attribute's TTL
+                          (or `max_age_s`)
+          "device"        a new read, which is then cached
+
+        fresh=True always reads from the device.
+        """
+        key = (device_name, attribute_name)
+        if not fresh:
+            with self.lock:
+                dev_entry = self.devices.get(device_name)
+                if (dev_entry is not None and dev_entry["healthy"]
+                        and _has_value_subscription(dev_entry, attribute_name, unfiltered=True)
+                        and attribute_name in dev_entry["latest_times"]):
+                    value = dev_entry["latest_events"][attribute_name]
+                    received = dev_entry["latest_times"][attribute_name]
+                    return value, "subscription", max(0.0, time.time() - received)
+            cached = self.read_cache.get(key, max_age_s)
+            if cached is not None:
+                return cached[0], "cache", time.time() - cached[1]
+
+        value = self.read_attribute(device_name, attribute_name)
+        self.read_cache.put(key, value, time.time())
+        return value, "device", 0.0
 
     def read_attributes(self, device_name: str, attributes: list):
         """
@@ -365,6 +2588,85 @@ class TangoManager:
             result[attr_data.name] = attr_data.value
         return result
 
+    def read_attributes_partial(self, device_name: str, attributes: list):
+        """
+        Read several attributes of one device with a single read_attributes
+        call, reporting failures per attribute instead of failing the lot.
+        Returns a dict of attribute_name -> (value, error_string_or_None).
+
+        If the batched call is rejected because of one bad attribute, the
+        attributes are read one by one to find out which ones fail. If the
+        device itself is unreachable the exception is raised as is.
+        """
+        dev_entry = self._get_or_create_device_entry(device_name)
+        proxy = dev_entry["proxy"]
+        result = {}
+        try:
+            attr_data_list = proxy.read_attributes(attributes)
+        except Exception as e:
+            if len(attributes) == 1 or _devfailed_reason(e) in _CONNECTION_FAILURE_REASONS:
+                raise
+            for attribute in attributes:
+                try:
+                    result[attribute] = (proxy.read_attribute(attribute).value, None)
+                except Exception as attr_error:
+                    result[attribute] = (None, str(attr_error))
+            return result
+
+        for requested, attr_data in zip(attributes, attr_data_list):
+            if getattr(attr_data, "has_failed", False):
+                try:
+                    error = str(attr_data.get_err_stack())
+                except Exception:
+                    error = "read failed"
+                result[requested] = (None, error)
+            else:
+                result[requested] = (attr_data.value, None)
+        return result
+
+    def snapshot_values(self, device_attributes: dict, deadline_s: float = FANOUT_DEADLINE_S):
+        """
+        Current values of many attributes across devices.
+        `device_attributes` maps device_name -> [attribute, ...].
+
+        Subscribed attributes are answered from the latest event value;
+        the rest are read with one read_attributes call per device, devices
+        being read concurrently. Returns
+        {(device_name, attribute): (value, error_or_None, source)} where
+        source is "subscription" or "read".
+        """
+        values = {}
+        to_read = {}
+        for device_name, attributes in device_attributes.items():
+            dev_entry = self.devices.get(device_name)
+            for attribute in dict.fromkeys(attributes):
+                with self.lock:
+                    cached = (
+                        dev_entry is not None
+                        and _has_value_subscription(dev_entry, attribute, unfiltered=True)
+                        and attribute in dev_entry["latest_events"]
+                    )
+                    if cached:
+                        value = dev_entry["latest_events"][attribute]
+                if cached:
+                    values[(device_name, attribute)] = (value, None, "subscription")
+                else:
+                    to_read.setdefault(device_name, []).append(attribute)
+
+        reads = self.fan_out(
+            lambda device_name: self.read_attributes_partial(device_name, to_read[device_name]),
+            list(to_read),
+            deadline_s
+        )
+        for device_name, result, error, elapsed in reads:
+            for attribute in to_read[device_name]:
+                if error is not None:
+                    values[(device_name, attribute)] = (None, str(error), "read")
+                else:
+                    value, attr_error = result[attribute]
+                    values[(device_name, attribute)] = (value, attr_error, "read")
+        return values
+
     def get_device_info(self, device_name: str):
         """
         Return device info from the proxy.
@@ -387,29 +2689,161 @@ class TangoManager:
 
     def get_event_logs(self):
         """
-        Return the entire (up to 100) event log as a list of dicts.
+        Return the entire (up to 100) event log as a list of EventRecords.
         """
         with self.lock:
             return list(self.event_logs)
 
-    def wait_for_next_event(self, device_name: str, attribute_name: str, timeout_s: float = 30.0):
+    def get_event_logs_after(self, after_seq: int, limit: int = None):
+        """
+        Return the log entries with a sequence number greater than
+        `after_seq` (oldest first, at most `limit` of them), together with
+        the number of events after the cursor that were already evicted from
+        the log and the latest sequence number handed out so far.
+
+        Sequence numbers in the log are contiguous, so the start position is
+        computed directly instead of scanning the deque.
+        """
+        with self.lock:
+            latest_seq = self.event_seq
+            if not self.event_logs:
+                return [], max(latest_seq - after_seq, 0), latest_seq
+            first_seq = self.event_logs[0].seq
+            missed = max(first_seq - after_seq - 1, 0)
+            start = max(after_seq + 1 - first_seq, 0)
+            stop = len(self.event_logs) if limit is None else min(start + limit, len(self.event_logs))
+            entries = [self.event_logs[i] for i in range(start, stop)]
+        return entries, missed, latest_seq
+
+    def wait_for_next_event(self, device_name: str, attribute_name: str, timeout_s: float = 30.0,
+                            condition: str = "next", value=None, count: int = 1):
         """
-        Block (up to `timeout_s` seconds) for the next event on a given
-        device/attribute. If a new event arrives, return True; otherwise raise
-        a timeout exception.
+        Block (up to `timeout_s` seconds) until an event on the given
+        device/attribute satisfies `condition` (see make_event_predicate).
+        Returns the matching value; raises TimeoutError otherwise.
+
+        For "equals" we also accept the latest known value, so waiting for a
+        state the attribute is already in returns immediately.
         """
         dev_entry = self._get_or_create_device_entry(device_name)
-        start_time = time.time()
+        key = (device_name, attribute_name)
+        predicate = make_event_predicate(condition, value, count)
 
-        initial_count = dev_entry["event_count"].get(attribute_name, 0)
+        # Register before looking at the current value so an event arriving
+        # in between cannot be missed.
+        waiter = self.waiters.register(key, predicate)
+        if condition == "equals":
+            with self.lock:
+                known = attribute_name in dev_entry["latest_events"]
+                current = dev_entry["latest_events"].get(attribute_name)
+            if known and _values_match(current, value):
+                self.waiters.cancel(key, waiter)
+                return current
 
-        while True:
-            time.sleep(0.1)
-            current_count = dev_entry["event_count"].get(attribute_name, 0)
-            if current_count > initial_count:
-                return True
-            if (time.time() - start_time) > timeout_s:
-                raise TimeoutError(f"No new event within {timeout_s} seconds.")
+        return self.waiters.wait(waiter, key, timeout_s)
+
+
+    def is_subscribed(self, device_name: str, attribute_name: str):
+        with self.lock:
+            dev_entry = self.devices.get(device_name)
+            return dev_entry is not None and _has_value_subscription(dev_entry, attribute_name)
+
+    def _assertion_already_met(self, assertion: dict, since: float = None):
+        """
+        Check an assertion against what is already known, before waiting for
+        new events. Returns (met, value).
+        """
+        device_name = assertion["device"]
+        attribute_name = assertion["attribute_name"]
+        expected = assertion.get("value")
+        if "previous_value" not in assertion:
+            with self.lock:
+                dev_entry = self.devices.get(device_name)
+                if dev_entry is None or attribute_name not in dev_entry["latest_events"]:
+                    return False, None
+                current = dev_entry["latest_events"][attribute_name]
+            return _values_match(current, expected), current
+
+        if since is None:
+            return False, None
+        previous = self.history.sample_before(device_name, attribute_name, since)
+        previous_value = previous[1] if previous else None
+        for _, value in self.history.query(device_name, attribute_name, since):
+            if (_values_match(value, expected)
+                    and _values_match(previous_value, assertion["previous_value"])):
+                return True, value
+            previous_value = value
+        return False, None
+
+    def await_assertions(self, assertions: list, timeout_s: float, since: float = None):
+        """
+        Evaluate many "eventually" assertions at once, driven by events.
+
+        Each assertion is {"device", "attribute_name", "value"} plus an
+        optional "previous_value", meaning the attribute has to go from
+        previous_value to value. The call holds a share of each attribute's
+        subscription (subscribing it if needed) until it returns.
+
+        An assertion passes as soon as a matching event arrives, or straight
+        away when the latest value already equals "value" (no
+        previous_value) or, given `since` (epoch seconds), when the history
+        already holds the transition. Returns as soon as every assertion
+        passed or `timeout_s` expired, with one dict per assertion:
+        {"passed", "elapsed_ms", "actual"} (+ "error" if it could not run).
+        """
+        started = time.monotonic()
+        outcomes = [None] * len(assertions)
+        waiters = []
+        holder = f"assert:{uuid.uuid4().hex}"
+        held = []
+        try:
+            for i, assertion in enumerate(assertions):
+                device_name = assertion["device"]
+                attribute_name = assertion["attribute_name"]
+                key = (device_name, attribute_name)
+                predicate = make_event_predicate(
+                    "transition" if "previous_value" in assertion else "equals",
+                    assertion.get("value"),
+                    previous_value=assertion.get("previous_value")
+                )
+                # Register first so that no event is lost while subscribing
+                waiter = self.waiters.register(key, predicate)
+                waiters.append((i, key, waiter))
+                try:
+                    self.subscribe_attribute(device_name, attribute_name, holder=holder)
+                    held.append(key)
+                except Exception as e:
+                    outcomes[i] = {"passed": False, "elapsed_ms": 0.0, "actual": None, "error": str(e)}
+                    continue
+                met, value = self._assertion_already_met(assertion, since)
+                if met:
+                    outcomes[i] = {"passed": True, "elapsed_ms": 0.0, "actual": value}
+
+            for i, key, waiter in waiters:
+                if outcomes[i] is not None:
+                    continue
+                remaining = timeout_s - (time.monotonic() - started)
+                if waiter.event.wait(max(remaining, 0)):
+                    outcomes[i] = {
+                        "passed": True,
+                        "elapsed_ms": round((waiter.matched_at - started) * 1000.0, 3),
+                        "actual": waiter.value
+                    }
+                else:
+                    outcomes[i] = {
+                        "passed": False,
+                        "elapsed_ms": round((time.monotonic() - started) * 1000.0, 3),
+                        "actual": self.get_latest_event_value(*key)
+                    }
+        finally:
+            for i, key, waiter in waiters:
+                self.waiters.cancel(key, waiter)
+            for device_name, attribute_name in held:
+                try:
+                    self.unsubscribe_attribute(device_name, attribute_name, holder=holder)
+                except Exception:
+                    pass
+        return outcomes
 
 
 ###############################################################################
@@ -430,9 +2864,158 @@ def make_json_response(data, status=200):
     return jsonify(data), status
 
 
+def _json_safe(value):
+    """
+    Make a Tango value JSON-serializable: numpy arrays become lists and
+    anything else jsonify can't handle falls back to its string form.
+    """
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    try:
+        json.dumps(value)
+    except TypeError:
+        value = str(value)
+    return value
+
+
+###############################################################################
+# Value encodings
+###############################################################################
+# format= names of the binary encodings and the mimetypes that select them
+# through the Accept header
+_BINARY_FORMATS = {
+    "raw": "application/octet-stream",
+    "npy": "application/x-npy",
+}
+_JSON_ENCODINGS = ("json", "base64")
+
+
+def _little_endian_array(value):
+    """
+    Contiguous little-endian numpy array of a numeric value; scalars stay
+    0-d, so their shape is empty. Raises ValueError for values without a
+    fixed-size numeric representation.
+    """
+    array_value = numpy.asarray(value)
+    if array_value.ndim:
+        array_value = numpy.ascontiguousarray(array_value)
+    if array_value.dtype.kind not in "biuf":
+        raise ValueError(f"Values of type {array_value.dtype} have no binary encoding")
+    if array_value.dtype.byteorder == ">":
+        array_value = array_value.astype(array_value.dtype.newbyteorder("<"))
+    return array_value
+
+
+def _encode_value(value, encoding: str = "json"):
+    """
+    JSON form of a value. With encoding="base64" numeric arrays are packed as
+    {"dtype": "<f8", "shape": [...], "data": "<base64 of the raw bytes>"}
+    instead of a (much larger) list of numbers; scalars are left alone.
+    """
+    if encoding == "base64" and isinstance(value, numpy.ndarray):
+        try:
+            array_value = _little_endian_array(value)
+        except ValueError:
+            return _json_safe(value)
+        return {
+            "dtype": array_value.dtype.str,
+            "shape": list(array_value.shape),
+            "data": base64.b64encode(array_value.tobytes()).decode("ascii")
+        }
+    return _json_safe(value)
+
+
+def _json_encoding_arg(source=None):
+    """
+    The `format` option of endpoints that always answer in JSON.
+    """
+    encoding = (source if source is not None else request.args).get("format", "json")
+    if encoding not in _JSON_ENCODINGS:
+        raise ValueError(f"'format' must be one of {', '.join(_JSON_ENCODINGS)}")
+    return encoding
+
+
+def _requested_encoding():
+    """
+    Encoding asked for by the client of a single-value endpoint. The
+    `format` query parameter (json, base64, raw, npy) wins; otherwise the
+    Accept header picks between JSON, application/octet-stream (raw) and
+    application/x-npy.
+    """
+    encoding = request.args.get("format")
+    if encoding:
+        if encoding not in _JSON_ENCODINGS and encoding not in _BINARY_FORMATS:
+            raise ValueError(
+                f"'format' must be one of {', '.join(_JSON_ENCODINGS + tuple(_BINARY_FORMATS))}"
+            )
+        return encoding
+    best = request.accept_mimetypes.best_match(
+        ["application/json"] + list(_BINARY_FORMATS.values()), default="application/json"
+    )
+    for name, mimetype in _BINARY_FORMATS.items():
+        if best == mimetype:
+            return name
+    return "json"
+
+
+def make_binary_response(value, encoding: str, headers: dict = None):
+    """
+    Return a numeric value as raw little-endian bytes (encoding="raw") or as
+    a .npy file (encoding="npy"). dtype and shape travel in the X-Tango-Dtype
+    and X-Tango-Shape headers. Non-numeric values get a 406.
+    """
+    try:
+        array_value = _little_endian_array(value)
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 406)
+
+    if encoding == "npy":
+        buffer = io.BytesIO()
+        numpy.save(buffer, array_value, allow_pickle=False)
+        body = buffer.getvalue()
+    else:
+        body = array_value.tobytes()
+    headers = dict(headers or {})
+    headers["X-Tango-Dtype"] = array_value.dtype.str
+    headers["X-Tango-Shape"] = ",".join(str(dim) for dim in array_value.shape)
+    return Response(body, mimetype=_BINARY_FORMATS[encoding], headers=headers)
+
+
 ###############################################################################
 # Flask endpoints
 ###############################################################################
+def _parse_subscription_entry(attribute):
+    """
+    An attribute of a /subscribe_event body, either a plain name or an
+    object {"name": ..., "event_type": ..., <SubscriptionFilter options>}.
+    Returns (attribute_name, options or None, event_type); raises
+    ValueError.
+    """
+    if isinstance(attribute, str):
+        return attribute, None, CHANGE_EVENT_TYPE
+    if not isinstance(attribute, dict) or not attribute.get("name"):
+        raise ValueError("Attributes must be names or objects with a 'name'")
+    options = dict(attribute)
+    name = options.pop("name")
+    event_type = options.pop("event_type", CHANGE_EVENT_TYPE)
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type '{event_type}', expected one of {', '.join(EVENT_TYPES)}")
+    options = SubscriptionFilter.parse_options(options) or None
+    if options and event_type not in VALUE_EVENT_TYPES:
+        raise ValueError(f"'{event_type}' events carry no value to filter")
+    return name, options, event_type
+
+
+def _client_id(body_client_id=None):
+    """
+    Holder id of the calling client for shared subscriptions: the
+    X-Client-Id header, else the body's "client_id", else the default
+    holder shared by all clients that send neither (counted once per
+    subscribe, see TangoManager.subscribe_attribute).
+    """
+    return request.headers.get("X-Client-Id") or body_client_id or DEFAULT_SUBSCRIPTION_HOLDER
+
+
 @module1.route("/subscribe_event", methods=["POST"])
 def subscribe_event():
     """
@@ -441,12 +3024,30 @@ def subscribe_event():
       "sys/tg_test/1": ["ampli", "xyz"],
       "sys/tg_test/2": ["ampli2"]
     }
+
+    An attribute can also be given as an object with an event type and/or
+    ingest options:
+      {"name": "pointing", "max_rate_hz": 5, "abs_change": 0.01}
+      {"name": "obsState", "on_change_only": true}
+      {"name": "temperature", "event_type": "periodic"}
+    (event_type: change (default), periodic, archive, user, attr_conf,
+     data_ready; options: abs_change, rel_change, max_rate_hz,
+     on_change_only)
+
+    Subscriptions are shared: the client (X-Client-Id header, or a
+    "client_id" key in the body) becomes one of the holders of each
+    attribute's single Tango subscription.
+
+    The response lists the outcome per attribute under "subscriptions";
+    the status is 207 when some attributes failed and 500 when all did.
     """
     data = request.get_json()
     if not data:
         return make_json_response({"error": "Missing request body"}, 400)
+    data = dict(data)
+    client_id = _client_id(data.pop("client_id", None))
 
-    responses = []
+    requested = []
     for device_name, attributes in data.items():
         if not isinstance(attributes, list):
             return make_json_response(
@@ -455,25 +3056,40 @@ def subscribe_event():
             )
         for attribute in attributes:
             try:
-                tango_manager.subscribe_attribute(device_name, attribute)
-                responses.append({
-                    "device": device_name,
-                    "attribute": attribute,
-                    "status": "subscribed"
-                })
-            except Exception as e:
-                responses.append({
-                    "device": device_name,
-                    "attribute": attribute,
-                    "status": "error",
-                    "error": str(e)
-                })
+                requested.append((device_name,) + _parse_subscription_entry(attribute))
+            except ValueError as e:
+                return make_json_response({"error": f"{device_name}: {e}"}, 400)
+
+    responses = []
+    for device_name, attribute, options, event_type in requested:
+        try:
+            tango_manager.subscribe_attribute(
+                device_name, attribute, options, holder=client_id, event_type=event_type
+            )
+            responses.append({
+                "device": device_name,
+                "attribute": attribute,
+                "event_type": event_type,
+                "status": "subscribed"
+            })
+        except Exception as e:
+            responses.append({
+                "device": device_name,
+                "attribute": attribute,
+                "event_type": event_type,
+                "status": "error",
+                "error": str(e)
+            })
 
+    failed = sum(1 for response in responses if response["status"] == "error")
+    if not failed:
+        status = 200
+    else:
+        status = 500 if failed == len(responses) else 207
     return make_json_response({
-                    "device": str(device_name),
-                    "attribute": str(attribute),
-                    "status": "subscribed"
-                }, 200)
+        "status": "error" if failed else "subscribed",
+        "subscriptions": responses
+    }, status)
 
 
 @module1.route("/unsubscribe", methods=["POST"])
@@ -482,8 +3098,14 @@ def unsubscribe():
     JSON body example:
     {
       "device": "sys/tg_test/1",
-      "attribute": "ampli"
+      "attribute": "ampli",
+      "client_id": "ci-job-17",   (optional, or the X-Client-Id header)
+      "event_type": "change",     (optional, see /subscribe_event)
+      "force": false              (optional, drop the subscription for all
+                                   holders)
     }
+
+    The Tango subscription is only removed when its last holder leaves.
     """
     data = request.get_json()
     device_name = data.get("device")
@@ -494,17 +3116,146 @@ def unsubscribe():
             {"error": "Missing 'device' or 'attribute'"},
             400
         )
+    event_type = data.get("event_type", CHANGE_EVENT_TYPE)
+    if event_type not in EVENT_TYPES:
+        return make_json_response(
+            {"error": f"Unknown event type '{event_type}', expected one of {', '.join(EVENT_TYPES)}"},
+            400
+        )
 
     try:
-        tango_manager.unsubscribe_attribute(device_name, attribute)
+        remaining = tango_manager.unsubscribe_attribute(
+            device_name, attribute, holder=_client_id(data.get("client_id")),
+            force=bool(data.get("force")), event_type=event_type
+        )
+        if remaining:
+            return make_json_response({
+                "message": f"Released {device_name}/{attribute}, still held by {remaining} client(s)",
+                "holders": remaining
+            }, 200)
         return make_json_response(
-            {"message": f"Unsubscribed {device_name}/{attribute}"},
+            {"message": f"Unsubscribed {device_name}/{attribute}", "holders": 0},
             200
         )
     except Exception as e:
         return make_json_response({"error": str(e)}, 500)
 
 
+@module1.route("/event_queue", methods=["GET"])
+def event_queue():
+    """
+    Ingest queue metrics: current depth and high watermark, age of the
+    oldest queued event, enqueued/applied/dropped/batch counters and the
+    attributes that lost the most events to overflow.
+    """
+    return make_json_response(tango_manager.ingest_queue.stats(), 200)
+
+
+@module1.route("/subscriptions", methods=["GET"])
+def subscriptions():
+    """
+    Active subscriptions per device with their holders, and the ingest
+    options and received/delivered/filtered/coalesced counters of filtered
+    ones.
+    """
+    return make_json_response(tango_manager.get_subscriptions(), 200)
+
+
+def _poll_request_attributes(data: dict):
+    attributes = data.get("attributes")
+    if attributes is None and data.get("attribute"):
+        attributes = [data["attribute"]]
+    if not data.get("device") or not isinstance(attributes, list) or not attributes:
+        raise ValueError("Missing 'device' or 'attributes'")
+    return attributes
+
+
+@module1.route("/poll", methods=["POST"])
+def poll():
+    """
+    JSON body example:
+    {
+      "device": "sys/tg_test/1",
+      "attributes": ["temperature", "pressure"],   (or "attribute": "...")
+      "period_ms": 1000,
+      "client_id": "ci-job-17",     (optional, or the X-Client-Id header)
+      "on_change_only": false       (optional SubscriptionFilter options;
+                                     on_change_only defaults to true)
+    }
+
+    The attributes are read by the server every period_ms (the shortest
+    period any holder asked for), one read_attributes call per device,
+    and the values are stored like event values.
+    """
+    data = request.get_json() or {}
+    try:
+        attributes = _poll_request_attributes(data)
+        period_ms = float(data.get("period_ms", 0))
+        options = {name: data[name] for name in SubscriptionFilter.OPTIONS if name in data}
+        options = SubscriptionFilter.parse_options(options) if options else None
+        if options is not None and "on_change_only" in data:
+            options["on_change_only"] = bool(data["on_change_only"])
+    except (TypeError, ValueError) as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    device_name = data["device"]
+    holder = _client_id(data.get("client_id"))
+    holders = {}
+    try:
+        for attribute in attributes:
+            holders[attribute] = tango_manager.poller.poll(
+                device_name, attribute, period_ms, holder=holder, options=options
+            )
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+    except Exception as e:
+        return make_json_response({"error": str(e)}, 500)
+    return make_json_response({
+        "device": device_name,
+        "period_ms": period_ms,
+        "holders": holders
+    }, 200)
+
+
+@module1.route("/unpoll", methods=["POST"])
+def unpoll():
+    """
+    JSON body example:
+    {
+      "device": "sys/tg_test/1",
+      "attributes": ["temperature"],   (or "attribute": "...")
+      "client_id": "ci-job-17",        (optional, or the X-Client-Id header)
+      "force": false                   (optional, stop for all holders)
+    }
+    """
+    data = request.get_json() or {}
+    try:
+        attributes = _poll_request_attributes(data)
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    holder = _client_id(data.get("client_id"))
+    remaining = {
+        attribute: tango_manager.poller.unpoll(
+            data["device"], attribute, holder=holder, force=bool(data.get("force"))
+        )
+        for attribute in attributes
+    }
+    return make_json_response({"device": data["device"], "holders": remaining}, 200)
+
+
+@module1.route("/polls", methods=["GET"])
+def polls():
+    """
+    Polled attributes per device with their period, holders, read/error/
+    overrun counters and filter counters.
+    """
+    return make_json_response({
+        "polls": tango_manager.poller.list(),
+        "overruns": tango_manager.poller.overruns
+    }, 200)
+
+
 @module1.route("/command_inout", methods=["POST"])
 def command_inout():
     """
@@ -515,6 +3266,14 @@ def command_inout():
       "input_args": "some string or JSON",
       "if_dumps": false
     }
+
+    With ?async=1 (or "async": true in the body) the command runs on the
+    command worker pool and the response is 202 {"job_id": ...}; use
+    /jobs/<job_id> or /jobs/<job_id>/wait to collect the result.
+
+    With "track_lrc": true the device's longRunningCommandResult is
+    subscribed before the command is sent, and the long running command ID
+    is returned as "command_id" for use with /wait_for_command.
     """
     try:
         data = request.get_json()
@@ -536,12 +3295,26 @@ def command_inout():
         if if_dumps and input_args is not None:
             # Convert input_args to a JSON string
             input_args = json.dumps(input_args)
-        
+
+        if data.get("track_lrc", False):
+            tango_manager.lrc.ensure_subscribed(device_name)
+
+        run_async = request.args.get("async", "").lower() in ("1", "true", "yes") or data.get("async") is True
+        if run_async:
+            job_id = tango_manager.jobs.submit(
+                lambda: tango_manager.run_command(device_name, command_name, input_args),
+                device=device_name,
+                command_name=command_name
+            )
+            return make_json_response({"job_id": job_id, "status": "queued"}, 202)
+
         if str(input_args):
             result = tango_manager.run_command(device_name, command_name, input_args)
         else:
             result = tango_manager.run_command(device_name, command_name, args=None)
 
+        command_id = _lrc_id_from_command_result(result) if data.get("track_lrc", False) else None
+
         # If 'result' is not JSON-serializable, convert it to string
         # e.g. PyTango objects, or anything else that is not trivially serializable
         try:
@@ -551,17 +3324,169 @@ def command_inout():
             # Fallback to a string representation
             result = str(result)
 
+        if command_id is not None:
+            return make_json_response({"result": result, "command_id": command_id}, 200)
         return make_json_response({"result": result}, 200)
 
     except Exception as e:
         return make_json_response({"error": str(e)}, 500)
 
 
+def _job_response(job):
+    return dict(job, result=_json_safe(job["result"]))
+
+
+@module1.route("/jobs", methods=["GET"])
+def list_jobs():
+    """
+    List the asynchronous command jobs still in the job table (without
+    their results).
+    """
+    return make_json_response({"jobs": tango_manager.jobs.list()}, 200)
+
+
+@module1.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Status of an asynchronous command job:
+    {"job_id", "device", "command_name", "status": queued|running|done|failed,
+     "submitted_at", "started_at", "finished_at", "result", "error"}
+    """
+    job = tango_manager.jobs.get(job_id)
+    if job is None:
+        return make_json_response({"error": f"Unknown or expired job '{job_id}'"}, 404)
+    return make_json_response(_job_response(job), 200)
+
+
+@module1.route("/jobs/<job_id>/wait", methods=["GET"])
+def wait_job(job_id):
+    """
+    Query parameters:
+    /jobs/<job_id>/wait?timeout=30
+
+    Block until the job has finished (200) or the timeout expired (408),
+    returning the job status either way.
+    """
+    try:
+        timeout_s = float(request.args.get("timeout", "30"))
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    job = tango_manager.jobs.wait(job_id, timeout_s)
+    if job is None:
+        return make_json_response({"error": f"Unknown or expired job '{job_id}'"}, 404)
+    status = 200 if job["finished_at"] is not None else 408
+    return make_json_response(_job_response(job), status)
+
+
+@module1.route("/wait_for_command", methods=["GET"])
+def wait_for_command():
+    """
+    Query parameters:
+    /wait_for_command?device=ska_mid/tm_subarray_node/1&command_id=...&timeout=60
+
+    Wait for the longRunningCommandResult event reporting `command_id`
+    (subscribing to it on demand) and return
+    {"command_id", "device", "result", "decoded", "timestamp"}, or 408 on
+    timeout. Results that already arrived are returned immediately.
+    """
+    device_name = request.args.get("device")
+    command_id = request.args.get("command_id")
+    if not device_name or not command_id:
+        return make_json_response({"error": "Missing 'device' or 'command_id'"}, 400)
+    try:
+        timeout_s = float(request.args.get("timeout", "30"))
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    try:
+        result = tango_manager.lrc.wait_for_command(device_name, command_id, timeout_s)
+        return make_json_response(dict(result, decoded=_json_safe(result["decoded"])), 200)
+    except TimeoutError as e:
+        return make_json_response({"error": str(e), "command_id": command_id}, 408)
+    except Exception as e:
+        return make_json_response({"error": str(e)}, 500)
+
+
+@module1.route("/command_group", methods=["POST"])
+def command_group():
+    """
+    Run one command on many devices at once.
+
+    JSON body example (give either "devices" or "pattern"):
+    {
+      "devices": ["mid-dish/leaf-node/1", "mid-dish/leaf-node/2"],
+      "pattern": "mid-dish/leaf-node/*",
+      "command_name": "SetStandbyFPMode",
+      "input_args": null,
+      "if_dumps": false,
+      "timeout": 10
+    }
+
+    Response:
+    {
+      "command_name": "SetStandbyFPMode",
+      "results": {
+        "mid-dish/leaf-node/1": {"result": ..., "latency_ms": 12.3},
+        "mid-dish/leaf-node/2": {"error": "...", "latency_ms": 3000.0}
+      },
+      "errors": 1,
+      "elapsed_ms": 3001.2
+    }
+    """
+    data = request.get_json()
+    if not data:
+        return make_json_response({"error": "No JSON payload received"}, 400)
+
+    devices = data.get("devices")
+    pattern = data.get("pattern")
+    command_name = data.get("command_name")
+    input_args = data.get("input_args", None)
+    if not command_name:
+        return make_json_response({"error": "Missing 'command_name'"}, 400)
+    if not pattern and not (isinstance(devices, list) and devices):
+        return make_json_response({"error": "Missing 'devices' list or 'pattern'"}, 400)
+    if data.get("if_dumps", False) and input_args is not None:
+        input_args = json.dumps(input_args)
+    try:
+        deadline_s = float(data.get("timeout", FANOUT_DEADLINE_S))
+    except (TypeError, ValueError) as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    started = time.monotonic()
+    try:
+        members = tango_manager.resolve_group(devices, pattern)
+    except Exception as e:
+        return make_json_response({"error": str(e)}, 500)
+
+    results = {}
+    errors = 0
+    replies = tango_manager.run_group_command(members, command_name, input_args, deadline_s)
+    for device_name, result, error, elapsed in replies:
+        latency_ms = round(elapsed * 1000.0, 3)
+        if error is not None:
+            errors += 1
+            results[device_name] = {"error": str(error), "latency_ms": latency_ms}
+        else:
+            results[device_name] = {"result": _json_safe(result), "latency_ms": latency_ms}
+
+    return make_json_response({
+        "command_name": command_name,
+        "results": results,
+        "errors": errors,
+        "elapsed_ms": round((time.monotonic() - started) * 1000.0, 3)
+    }, 200)
+
+
 @module1.route("/latest_event", methods=["GET"])
 def latest_event():
     """
     Query parameters:
     /latest_event?device=sys/tg_test/1&attribute=ampli
+    optional:
+      format=json|base64|raw|npy   (raw/npy can also be asked for with
+                                    Accept: application/octet-stream or
+                                    application/x-npy)
     """
     device_name = request.args.get("device")
     attribute = request.args.get("attribute")
@@ -571,14 +3496,23 @@ def latest_event():
             {"error": "Missing 'device' or 'attribute'"},
             400
         )
+    try:
+        encoding = _requested_encoding()
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
 
     val = tango_manager.get_latest_event_value(device_name, attribute)
+    if encoding in _BINARY_FORMATS:
+        return make_binary_response(val, encoding, {
+            "X-Tango-Device": device_name,
+            "X-Tango-Attribute": attribute
+        })
     # val might be anything - int, float, str, list, ...
     # Usually it's safe for JSON, but if it's not, use str(val).
     return make_json_response({
         "device": device_name,
         "attribute": attribute,
-        "last_event_value": val
+        "last_event_value": _encode_value(val, encoding)
     }, 200)
 
 
@@ -586,11 +3520,283 @@ def latest_event():
 def event_logs():
     """
     Return the most recent (up to 100) event logs.
+
+    Query parameters (optional):
+      after=1234   only return entries with seq > 1234
+      limit=50     return at most this many entries
+      format=base64  pack numeric array values as base64
+
+    With `after`, the response also carries:
+      next_cursor  the seq to pass as `after` on the next poll
+      missed       how many events after the cursor were already evicted
+                   from the log (non-zero means the client saw a gap)
+      has_more     whether `limit` cut the result short
+
+    A negative `after` is a 400. An `after` beyond latest_seq (e.g. a cursor
+    kept across a server restart) is a 409 carrying latest_seq; the client
+    should start over from after=0.
+    """
+    try:
+        after = request.args.get("after")
+        after = int(after) if after is not None else None
+        limit = request.args.get("limit")
+        limit = int(limit) if limit is not None else None
+        encoding = _json_encoding_arg()
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+    if limit is not None and limit < 0:
+        return make_json_response({"error": "'limit' must be >= 0"}, 400)
+    if after is not None and after < 0:
+        return make_json_response({"error": "'after' must be >= 0"}, 400)
+
+    if after is None:
+        logs = tango_manager.get_event_logs()
+        if limit is not None:
+            logs = logs[len(logs) - limit:] if limit else []
+        return make_json_response({
+            "event_logs": [entry.to_dict(encoding) for entry in logs],
+            "latest_seq": tango_manager.event_seq
+        }, 200)
+
+    logs, missed, latest_seq = tango_manager.get_event_logs_after(after, limit)
+    if after > latest_seq:
+        return make_json_response({
+            "error": f"Cursor {after} is ahead of the latest event {latest_seq}; start again from 0",
+            "latest_seq": latest_seq,
+            "cursor_reset": True
+        }, 409)
+    # With nothing returned, only skip the evicted events (after + missed is
+    # the seq just before the oldest one still in the log)
+    next_cursor = logs[-1].seq if logs else after + missed
+    return make_json_response({
+        "event_logs": [entry.to_dict(encoding) for entry in logs],
+        "next_cursor": next_cursor,
+        "latest_seq": latest_seq,
+        "missed": missed,
+        "evicted": missed > 0,
+        "has_more": next_cursor < latest_seq
+    }, 200)
+
+
+@module1.route("/wait_for_event", methods=["GET"])
+def wait_for_event():
+    """
+    Wait for an event on a specified device & attribute, up to a
+    configurable timeout (in seconds).
+
+    Query parameters:
+      device=sys/tg_test/1
+      attribute=ampli
+      timeout=30               (optional, default=30)
+      condition=next           (optional: next | count | equals | changed_from)
+      value=READY              (for equals / changed_from)
+      count=3                  (for count)
+      format=base64            (optional, pack numeric array values as base64)
+    """
+    device_name = request.args.get("device")
+    attribute = request.args.get("attribute")
+    condition = request.args.get("condition", "next")
+    value = request.args.get("value")
+
+    if not device_name or not attribute:
+        return make_json_response({"error": "Missing 'device' or 'attribute'"}, 400)
+    if condition in ("equals", "changed_from") and value is None:
+        return make_json_response({"error": f"Condition '{condition}' needs a 'value'"}, 400)
+
+    try:
+        timeout_s = float(request.args.get("timeout", "30"))
+        count = int(request.args.get("count", "1"))
+        encoding = _json_encoding_arg()
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    try:
+        matched = tango_manager.wait_for_next_event(
+            device_name, attribute, timeout_s,
+            condition=condition, value=value, count=count
+        )
+        return make_json_response({"status": True, "value": _encode_value(matched, encoding)}, 200)
+    except TimeoutError as e:
+        return make_json_response({"error": str(e)}, 408)
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+    except Exception as e:
+        return make_json_response({"error": str(e)}, 500)
+
+
+def _format_sse(entry, encoding: str = "json"):
+    """
+    Render one event log entry as a Server-Sent Events message.
+    """
+    return f"id: {entry.seq}\nevent: tango_event\ndata: {json.dumps(entry.to_dict(encoding))}\n\n"
+
+
+def _format_sse_gap(info: dict):
+    """
+    Tell a stream client that some events will never reach it.
+    """
+    return f"event: gap\ndata: {json.dumps(info)}\n\n"
+
+
+@module1.route("/events/stream", methods=["GET"])
+def events_stream():
+    """
+    Server-Sent Events stream of subscribed attribute events.
+
+    Query parameters:
+      device=mid-csp/*          (optional glob, default "*")
+      attribute=obsState        (optional glob, default "*")
+      after=1234                (optional, resume after this sequence number;
+                                 the standard Last-Event-ID header also works)
+      format=base64             (optional, pack numeric array values as base64)
+
+    Each message has `id: <seq>` and a JSON `data:` payload identical to an
+    /event_logs entry. If the client resumes from a cursor that has already
+    left the event log, or its queue overflowed, a `gap` event is sent first.
+    A cursor beyond the latest event (kept across a server restart) gets a
+    `gap` event with "reset": true, and the stream restarts from the oldest
+    event still in the log.
+    """
+    device_pattern = request.args.get("device", "*")
+    attribute_pattern = request.args.get("attribute", "*")
+    after = request.args.get("after", request.headers.get("Last-Event-ID"))
+    try:
+        after = int(after) if after not in (None, "") else None
+    except ValueError:
+        return make_json_response({"error": f"Invalid cursor '{after}'"}, 400)
+    if after is not None and after < 0:
+        return make_json_response({"error": "'after' must be >= 0"}, 400)
+    try:
+        encoding = _json_encoding_arg()
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    # Open the stream before reading the backlog so nothing published in
+    # between is lost; duplicates are skipped by sequence number below.
+    stream = tango_manager.broadcaster.open(device_pattern, attribute_pattern)
+    backlog = tango_manager.get_event_logs() if after is not None else []
+    latest_seq = tango_manager.event_seq
+
+    def generate():
+        last_seq = after if after is not None else 0
+        try:
+            if last_seq > latest_seq:
+                yield _format_sse_gap({"after": last_seq, "latest_seq": latest_seq, "reset": True})
+                last_seq = 0
+            if backlog and backlog[0].seq > last_seq + 1:
+                yield _format_sse_gap({"after": last_seq, "oldest_available": backlog[0].seq})
+            for entry in backlog:
+                if entry.seq > last_seq and stream.matches(entry.device, entry.attribute):
+                    last_seq = entry.seq
+                    yield _format_sse(entry, encoding)
+            while True:
+                entries, dropped = stream.drain(EVENT_STREAM_KEEPALIVE_S)
+                if dropped:
+                    yield _format_sse_gap({"dropped": dropped})
+                if not entries:
+                    yield ": keepalive\n\n"
+                    continue
+                for entry in entries:
+                    if entry.seq > last_seq:
+                        last_seq = entry.seq
+                        yield _format_sse(entry, encoding)
+        finally:
+            tango_manager.broadcaster.close(stream)
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _parse_time(value):
+    """
+    Accept either epoch seconds ("1718000000.5") or an ISO-8601 string
+    ("2024-06-10T08:13:20") and return epoch seconds.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+@module1.route("/history", methods=["GET"])
+def history():
+    """
+    Query parameters:
+    /history?device=sys/tg_test/1&attribute=ampli&from=...&to=...&limit=500
+
+    `from`/`to` are optional epoch seconds or ISO-8601 timestamps (inclusive).
+    Samples are returned oldest first; format=base64 packs numeric array
+    values as base64.
+    """
+    device_name = request.args.get("device")
+    attribute = request.args.get("attribute")
+    if not device_name or not attribute:
+        return make_json_response({"error": "Missing 'device' or 'attribute'"}, 400)
+
+    try:
+        t_from = _parse_time(request.args.get("from"))
+        t_to = _parse_time(request.args.get("to"))
+        limit = request.args.get("limit")
+        limit = int(limit) if limit is not None else None
+        encoding = _json_encoding_arg()
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+    if limit is not None and limit < 0:
+        return make_json_response({"error": "'limit' must be >= 0"}, 400)
+
+    samples = tango_manager.history.query(device_name, attribute, t_from, t_to, limit)
+    return make_json_response({
+        "device": device_name,
+        "attribute": attribute,
+        "count": len(samples),
+        "samples": [
+            {
+                "timestamp": datetime.datetime.fromtimestamp(ts).isoformat(),
+                "epoch": ts,
+                "value": _encode_value(value, encoding)
+            }
+            for ts, value in samples
+        ]
+    }, 200)
+
+
+@module1.route("/history/retention", methods=["POST"])
+def history_retention():
+    """
+    JSON body example (device and attribute together or not at all; without
+    them the defaults for all attributes are changed):
+    {
+      "device": "sys/tg_test/1",
+      "attribute": "ampli",
+      "max_samples": 50000,
+      "max_age_s": 3600
+    }
     """
-    logs = tango_manager.get_event_logs()
-    # logs is a list of dicts, presumably JSON-serializable.
-    # If there's any weird object, you'd do `str(...)` but likely not needed.
-    return make_json_response({"event_logs": logs}, 200)
+    data = request.get_json()
+    if not data:
+        return make_json_response({"error": "Missing request body"}, 400)
+
+    try:
+        max_samples = data.get("max_samples")
+        max_samples = int(max_samples) if max_samples is not None else None
+        max_age_s = data.get("max_age_s")
+        max_age_s = float(max_age_s) if max_age_s is not None else None
+    except (TypeError, ValueError) as e:
+        return make_json_response({"error": str(e)}, 400)
+    if max_samples is not None and max_samples < 1:
+        return make_json_response({"error": "'max_samples' must be >= 1"}, 400)
+    if max_age_s is not None and max_age_s < 0:
+        return make_json_response({"error": "'max_age_s' must be >= 0"}, 400)
+
+    try:
+        tango_manager.history.configure(
+            data.get("device"), data.get("attribute"), max_samples, max_age_s
+        )
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
+    return make_json_response({"history": tango_manager.history.stats()}, 200)
 
 
 @module1.route("/ping_device", methods=["GET"])
@@ -614,22 +3820,44 @@ def ping_device():
 def ping_devices():
     """
     Query parameters:
-    /ping_devices?devices=sys/tg_test/1,sys/tg_test/2
+    /ping_devices?devices=sys/tg_test/1,sys/tg_test/2&timeout=5&stream=1
+
+    Devices are pinged concurrently on the shared worker pool. `timeout`
+    (seconds, optional) bounds the whole request; devices that have not
+    answered by then are reported with an error. Every result carries the
+    client-side round trip in `latency_ms`.
+
+    With stream=1 the response is newline-delimited JSON, one line per
+    device in completion order, so fast devices are reported immediately.
     """
     devices_param = request.args.get("devices")
     if not devices_param:
         return make_json_response({"error": "Missing 'devices' param"}, 400)
+    try:
+        deadline_s = float(request.args.get("timeout", FANOUT_DEADLINE_S))
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
 
-    device_names = devices_param.split(",")
-    results = {}
+    device_names = list(dict.fromkeys(
+        name.strip() for name in devices_param.split(",") if name.strip()
+    ))
+    pings = tango_manager.fan_out(tango_manager.ping_device, device_names, deadline_s)
 
-    for device_name in device_names:
-        try:
-            result = tango_manager.ping_device(device_name.strip())
-            results[device_name] = {"ping_result": str(result)}
-        except Exception as e:
-            results[device_name] = {"error": str(e)}
+    def _result(result, error, elapsed):
+        latency_ms = round(elapsed * 1000.0, 3)
+        if error is not None:
+            return {"error": str(error), "latency_ms": latency_ms}
+        return {"ping_result": str(result), "latency_ms": latency_ms}
 
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        def generate():
+            for device_name, result, error, elapsed in pings:
+                yield json.dumps(dict(_result(result, error, elapsed), device=device_name)) + "\n"
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    results = {}
+    for device_name, result, error, elapsed in pings:
+        results[device_name] = _result(result, error, elapsed)
     return make_json_response(results, 200)
 
 
@@ -638,6 +3866,15 @@ def read_attribute():
     """
     Query parameters:
     /read_attribute?device=sys/tg_test/1&attribute=ampli
+    optional:
+      fresh=1        bypass the subscription value and read cache
+      max_age=2.0    accept a cached read up to this many seconds old
+      format=json|base64|raw|npy   (raw/npy can also be asked for with
+                                    Accept: application/octet-stream or
+                                    application/x-npy)
+
+    The response tells where the value came from ("source": subscription,
+    cache or device) and how old it is ("age_s").
     """
     device_name = request.args.get("device")
     attribute_name = request.args.get("attribute")
@@ -646,18 +3883,74 @@ def read_attribute():
             {"error": "Missing 'device' or 'attribute' param"},
             400
         )
+    fresh = request.args.get("fresh", "").lower() in ("1", "true", "yes")
+    try:
+        max_age_s = request.args.get("max_age")
+        max_age_s = float(max_age_s) if max_age_s is not None else None
+        encoding = _requested_encoding()
+    except ValueError as e:
+        return make_json_response({"error": str(e)}, 400)
 
     try:
-        val = tango_manager.read_attribute(device_name, attribute_name)
-        # val might be an int, float, or even an array. Usually safe to JSONify.
-        return make_json_response(
-            {"device": device_name, "attribute": attribute_name, "value": val},
-            200
+        val, source, age_s = tango_manager.read_attribute_cached(
+            device_name, attribute_name, max_age_s, fresh
         )
+        if encoding in _BINARY_FORMATS:
+            return make_binary_response(val, encoding, {
+                "X-Tango-Device": device_name,
+                "X-Tango-Attribute": attribute_name,
+                "X-Tango-Source": source,
+                "X-Tango-Age": str(round(age_s, 6))
+            })
+        return make_json_response({
+            "device": device_name,
+            "attribute": attribute_name,
+            "value": _encode_value(val, encoding),
+            "source": source,
+            "age_s": round(age_s, 6)
+        }, 200)
     except Exception as e:
         return make_json_response({"error": str(e)}, 500)
 
 
+@module1.route("/read_cache/ttl", methods=["POST"])
+def read_cache_ttl():
+    """
+    JSON body example (device and attribute together or not at all; without
+    them the default TTL for all attributes is changed, "ttl_s": null
+    removes an override):
+    {
+      "device": "sys/tg_test/1",
+      "attribute": "ampli",
+      "ttl_s": 2.0
+    }
+    """
+    data = request.get_json()
+    if not data or "ttl_s" not in data:
+        return make_json_response({"error": "Missing 'ttl_s'"}, 400)
+    try:
+        ttl_s = float(data["ttl_s"]) if data["ttl_s"] is not None else None
+    except (TypeError, ValueError) as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    device_name = data.get("device")
+    attribute = data.get("attribute")
+    if bool(device_name) != bool(attribute):
+        return make_json_response({"error": "Give both 'device' and 'attribute', or neither"}, 400)
+    if device_name and attribute:
+        tango_manager.read_cache.set_ttl((device_name, attribute), ttl_s)
+    elif ttl_s is None:
+        return make_json_response({"error": "The default TTL cannot be removed"}, 400)
+    else:
+        tango_manager.read_cache.default_ttl_s = ttl_s
+    return make_json_response({
+        "device": device_name,
+        "attribute": attribute,
+        "ttl_s": ttl_s,
+        "default_ttl_s": tango_manager.read_cache.default_ttl_s
+    }, 200)
+
+
 @module1.route("/read_attributes", methods=["POST"])
 def read_attributes():
     """
@@ -692,6 +3985,157 @@ def read_attributes():
         return make_json_response({"error": str(e)}, 500)
 
 
+@module1.route("/read_bulk", methods=["POST"])
+def read_bulk():
+    """
+    JSON body example:
+    {
+      "devices": {
+        "sys/tg_test/1": ["ampli", "phase"],
+        "sys/tg_test/2": ["state"]
+      },
+      "timeout": 5,      (optional, seconds for the whole request)
+      "format": "base64" (optional, pack numeric array values as base64)
+    }
+
+    One read_attributes call per device, run concurrently across devices.
+    Response:
+    {
+      "results": {
+        "sys/tg_test/1": {
+          "attributes": {"ampli": {"value": 1.5}, "phase": {"error": "..."}},
+          "latency_ms": 3.2
+        },
+        "sys/tg_test/2": {"error": "device unreachable", "latency_ms": 3000.1}
+      },
+      "errors": 2
+    }
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get("devices"), dict):
+        return make_json_response({"error": "Missing 'devices' map"}, 400)
+
+    devices = data["devices"]
+    for device_name, attributes in devices.items():
+        if not isinstance(attributes, list) or not attributes:
+            return make_json_response(
+                {"error": f"Attributes for device '{device_name}' must be a non-empty list"},
+                400
+            )
+    try:
+        deadline_s = float(data.get("timeout", FANOUT_DEADLINE_S))
+        encoding = _json_encoding_arg(data)
+    except (TypeError, ValueError) as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    results = {}
+    errors = 0
+    reads = tango_manager.fan_out(
+        lambda device_name: tango_manager.read_attributes_partial(device_name, devices[device_name]),
+        list(devices),
+        deadline_s
+    )
+    for device_name, values, error, elapsed in reads:
+        latency_ms = round(elapsed * 1000.0, 3)
+        if error is not None:
+            errors += len(devices[device_name])
+            results[device_name] = {"error": str(error), "latency_ms": latency_ms}
+            continue
+        attributes = {}
+        for attribute, (value, attr_error) in values.items():
+            if attr_error is not None:
+                errors += 1
+                attributes[attribute] = {"error": attr_error}
+            else:
+                attributes[attribute] = {"value": _encode_value(value, encoding)}
+        results[device_name] = {"attributes": attributes, "latency_ms": latency_ms}
+
+    return make_json_response({"results": results, "errors": errors}, 200)
+
+
+@module1.route('/assert_in', methods=['POST'])
+def assert_in_test():
+    """
+    JSON body example:
+    {
+      "description": "this assertion is made",
+      "assertions": [
+        {"device": "a/b/c", "attribute_name": "obsstate", "value": "READY"},
+        {"device": "a1/b1/c1", "attribute_name": "obsstate1", "value": "EMPTY"}
+      ]
+    }
+
+    Every assertion is answered in the request order under its index:
+    {"0": {..., "result": "True", "actual": ..., "source": "read"}, ...}
+
+    Assertions are grouped per device and checked with one read_attributes
+    call per device (devices in parallel) through the shared manager, or
+    from the subscription cache when the attribute is already subscribed.
+
+    "Eventually" mode, in the spirit of TangoEventTracer's
+    within_timeout(...).has_change_event_occurred(...): add
+      "within_timeout": 30,        seconds to wait for all assertions
+      "since": 1718000000.0        (optional) epoch/ISO time from which
+                                   already-recorded events count
+    and optionally "previous_value" on an assertion to require the
+    transition previous_value -> value. The server subscribes to the
+    attributes and answers as soon as all assertions passed or the timeout
+    expired; each entry then also carries "elapsed_ms".
+    """
+    data = request.get_json()
+    if not data:
+        return make_json_response({"error": "No JSON payload received"}, 400)
+    assertions = data.get('assertions', [])
+    if not isinstance(assertions, list):
+        return make_json_response({"error": "'assertions' must be a list"}, 400)
+
+    device_attributes = {}
+    for entry in assertions:
+        if not entry.get("device") or not entry.get("attribute_name"):
+            return make_json_response(
+                {"error": "Every assertion needs 'device' and 'attribute_name'"}, 400
+            )
+        device_attributes.setdefault(entry["device"], []).append(entry["attribute_name"])
+
+    try:
+        deadline_s = float(data.get("timeout", FANOUT_DEADLINE_S))
+        within_timeout = data.get("within_timeout")
+        within_timeout = float(within_timeout) if within_timeout is not None else None
+        since = _parse_time(data.get("since"))
+    except (TypeError, ValueError) as e:
+        return make_json_response({"error": str(e)}, 400)
+
+    if within_timeout is not None:
+        outcomes = tango_manager.await_assertions(assertions, within_timeout, since)
+        results = {}
+        for i, (entry, outcome) in enumerate(zip(assertions, outcomes)):
+            result = dict(
+                entry,
+                source="event",
+                result=str(outcome["passed"]),
+                actual=_json_safe(outcome["actual"]),
+                elapsed_ms=outcome["elapsed_ms"]
+            )
+            if "error" in outcome:
+                result["error"] = outcome["error"]
+            results[str(i)] = result
+        return make_json_response(results, 200)
+
+    values = tango_manager.snapshot_values(device_attributes, deadline_s)
+    results = {}
+    for i, entry in enumerate(assertions):
+        value, error, source = values[(entry["device"], entry["attribute_name"])]
+        result = dict(entry, source=source)
+        if error is not None:
+            result["result"] = str(False)
+            result["error"] = error
+        else:
+            result["result"] = str(_values_match(value, entry.get("value")))
+            result["actual"] = _json_safe(value)
+        results[str(i)] = result
+    return make_json_response(results, 200)
+
+
 @module1.route("/get_device_info", methods=["GET"])
 def get_device_info():
     """
@@ -713,6 +4157,16 @@ def get_device_info():
         return make_json_response({"error": str(e)}, 500)
 
 
+@module1.route("/proxy_pool", methods=["GET"])
+def proxy_pool():
+    """
+    Return the DeviceProxy pool counters (hits, misses, evictions,
+    health_failures, reconnects, shared_constructions, coalesced_reads,
+    coalesced_commands), its size and the state of each device.
+    """
+    return make_json_response(tango_manager.get_pool_stats(), 200)
+
+
 @module1.route("/reset_manager", methods=["POST"])
 def reset_manager():
     """
@@ -761,12 +4215,8 @@ def attribute_list():
         # If device_name was URL-encoded, decode it. If not, this is safe.
         device_name = unquote(device_name)
         
-        # Use TangoManager to get or create the device entry
-        dev_entry = tango_manager._get_or_create_device_entry(device_name)
-        proxy = dev_entry["proxy"]
-        
-        # Fetch attribute names using Tango DeviceProxy
-        attributes = list(proxy.get_attribute_list())
+        # Attribute names come from the cached device schema
+        attributes = list(tango_manager.schemas.get(device_name)["attributes"])
         
         return make_json_response({"attributes": attributes}, 200)
     
@@ -774,6 +4224,37 @@ def attribute_list():
         # Log the exception as needed
         return make_json_response({"error": str(e)}, 500)
 
+@module1.route("/device_schema", methods=["GET"])
+def device_schema():
+    """
+    Query parameters:
+    /device_schema?device=sys/tg_test/1&refresh=1
+
+    Returns the cached interface of a device:
+    {
+      "device": "sys/tg_test/1",
+      "attributes": {
+        "ampli": {"data_type": "DevDouble", "data_format": "SCALAR",
+                  "writable": "READ_WRITE", "enum_labels": [], ...}
+      },
+      "commands": {
+        "On": {"in_type": "DevVoid", "out_type": "DevVoid", ...}
+      },
+      "fingerprint": "<pid>@<start date>",
+      "built_at": 1718000000.0
+    }
+    """
+    device_name = request.args.get("device")
+    if not device_name:
+        return make_json_response({"error": "Missing 'device' param"}, 400)
+    refresh = request.args.get("refresh", "").lower() in ("1", "true", "yes")
+
+    try:
+        return make_json_response(tango_manager.schemas.get(unquote(device_name), refresh), 200)
+    except Exception as e:
+        return make_json_response({"error": str(e)}, 500)
+
+
 @module1.route("/set_attribute", methods=["POST"])
 def set_attribute():
     """
@@ -821,6 +4302,7 @@ def set_attribute():
         
         # Set the attribute value
         proxy.write_attribute(attribute, value)
+        tango_manager.read_cache.invalidate((device_name, attribute))
         
         return make_json_response({
             "device": device_name,